@@ -0,0 +1,231 @@
+""" A fake network for running traceroute offline.
+
+FakeNetwork stands in for the real network, and its sockets stand in for
+util.Socket, so traceroute() and traceroute_parallel() can be run without
+root or a network connection:
+
+    net = FakeNetwork(["10.0.0.1", None, "10.0.2.1"], "10.0.3.1")
+    traceroute.traceroute(net.udp_socket(), net.icmp_socket(), "10.0.3.1")
+
+Hops can also have latency, loss, ICMP rate limits, load balancing and
+duplicate replies (see Hop).  Time is simulated, so nothing ever actually
+waits: `net.now` says how long the real thing would have taken, and
+`net.timeouts` counts the recv_select()s that gave up.
+
+Run this file to trace a path with silent routers both ways, or see
+sim_bench.py for lots of messier paths.
+"""
+
+import functools
+import heapq
+import itertools
+import random
+import socket
+import struct
+import typing
+import zlib
+
+import util
+
+SRC_IP = "192.168.0.2"  # Our address
+SRC_PORT = 54321  # The UDP source port our probes come from
+
+
+def ipv4_header(src: str, dst: str, proto: int, ttl: int, length: int) -> bytes:
+    return struct.pack("!BBHHHBBH4s4s", 0x45, 0, length, 0, 0, ttl, proto, 0,
+                       socket.inet_aton(src), socket.inet_aton(dst))
+
+
+def udp_header(src_port: int, dst_port: int, length: int) -> bytes:
+    return struct.pack("!HHHH", src_port, dst_port, length, 0)
+
+
+@functools.lru_cache(maxsize=65536)
+def icmp_error(router: str, type: int, code: int, dst: str, dst_port: int,
+               ttl: int, payload_len: int) -> bytes:
+    """ Builds the ICMP error `router` sends us about a UDP probe.
+
+    Like real routers, it quotes the probe's IPv4 header and the first 8
+    bytes of its payload (the UDP header).  `ttl` is the probe's TTL when it
+    got to `router`.
+    """
+    quoted = ipv4_header(SRC_IP, dst, util.IPPROTO_UDP, ttl,
+                         20 + 8 + payload_len) + \
+        udp_header(SRC_PORT, dst_port, 8 + payload_len)
+    icmp = struct.pack("!BBHI", type, code, 0, 0) + quoted
+    return ipv4_header(router, SRC_IP, util.IPPROTO_ICMP, 64,
+                       20 + len(icmp)) + icmp
+
+
+class Hop:
+    """ One hop along a path, and how the routers there behave.
+
+    `routers` is who a probe might reach at this hop.  With more than one,
+    the hop is load balanced: each flow (destination IP and port) always goes
+    to the same one, but different ports can see different routers.  None
+    in place of a router means it never sends time exceeded messages.
+
+    latency -- seconds for a packet to cross this hop, each way
+    loss -- chance a packet crossing this hop is lost, each way
+    icmp_rate -- time exceeded messages per second each router will send
+                 (None for no limit), in bursts of up to icmp_burst
+    duplicate -- chance a reply from here arrives twice
+    """
+
+    def __init__(self, routers: typing.Union[None, str,
+                                             list[typing.Optional[str]]],
+                 latency: float = 0.0, loss: float = 0.0,
+                 icmp_rate: typing.Optional[float] = None,
+                 icmp_burst: float = 10, duplicate: float = 0.0):
+        if routers is None or isinstance(routers, str):
+            routers = [routers]
+        self.routers = list(routers)
+        self.latency = latency
+        self.loss = loss
+        self.icmp_rate = icmp_rate
+        self.icmp_burst = icmp_burst
+        self.duplicate = duplicate
+
+    def router(self, dst: str, port: int) -> typing.Optional[str]:
+        if len(self.routers) == 1:
+            return self.routers[0]
+        flow = zlib.crc32(f"{dst}:{port}".encode())
+        return self.routers[flow % len(self.routers)]
+
+
+class FakeNetwork:
+    """ Paths from us to some destinations.
+
+    `routers` lists each hop before `dst`: a router, None for a router which
+    never sends time exceeded messages, or a Hop for anything fancier.  More
+    paths can be added with add_path().  Probes to anywhere else vanish.
+
+    Time is simulated: `now` is how many seconds the real thing would have
+    taken so far.  Replies arrive a round trip after their probe is sent,
+    and recv_select() jumps ahead to the next one (or gives up after
+    SELECT_TIMEOUT, just like util.Socket).  Loss and duplicates are decided
+    by a random.Random(seed), so runs are repeatable.
+    """
+
+    def __init__(self, routers: list, dst: str, seed: int = 0):
+        self.paths = {}  # dst -> [Hop]
+        self._rtts = {}  # dst -> round trip time to each hop
+        self._lossy = {}  # dst -> [(index, loss)] for hops that lose packets
+        self.add_path(routers, dst)
+        self.rand = random.Random(seed)
+        self.now = 0.0
+        self.pending = []  # Heap of (arrival time, seq, reply, address)
+        self.sent = 0  # Probes sent
+        self.timeouts = 0  # recv_select()s which timed out
+        self._seq = itertools.count()
+        self._tokens = {}  # Rate limited router -> (tokens, as of when)
+
+    def add_path(self, routers: list, dst: str):
+        hops = [r if isinstance(r, Hop) else Hop(r) for r in routers]
+        self.paths[dst] = hops
+        rtt = 0.0
+        self._rtts[dst] = rtts = []
+        for hop in hops:
+            rtt += 2 * hop.latency
+            rtts.append(rtt)
+        self._lossy[dst] = [(i, h.loss) for i, h in enumerate(hops) if h.loss]
+
+    def udp_socket(self) -> "FakeSocket":
+        return FakeSocket(self)
+
+    def icmp_socket(self) -> "FakeSocket":
+        return FakeSocket(self)
+
+    def send(self, b: bytes, address: tuple[str, int], ttl: int):
+        self.sent += 1
+        ip, port = address
+        hops = self.paths.get(ip)
+        if hops is None:
+            return
+        rand = self.rand
+        for i, loss in self._lossy[ip]:
+            if i >= ttl:
+                break
+            if rand.random() < loss or rand.random() < loss:
+                return  # Lost on the way there or back
+        rtts = self._rtts[ip]
+        rtt = rtts[min(ttl, len(rtts)) - 1] if rtts else 0.0
+
+        if ttl <= len(hops):
+            hop = hops[ttl - 1]
+            router = hop.router(ip, port)
+            if router is None or not self._allow(router, hop):
+                return
+            reply = icmp_error(router, 11, 0, ip, port, 1, len(b))
+            copies = 2 if hop.duplicate and rand.random() < hop.duplicate \
+                else 1
+        else:
+            router = ip
+            reply = icmp_error(ip, 3, 3, ip, port, ttl - len(hops), len(b))
+            copies = 1
+        for _ in range(copies):
+            heapq.heappush(self.pending, (self.now + rtt, next(self._seq),
+                                          reply, (router, 0)))
+
+    def _allow(self, router: str, hop: Hop) -> bool:
+        """ Whether `router`'s ICMP rate limit lets it reply right now. """
+        if hop.icmp_rate is None:
+            return True
+        tokens, then = self._tokens.get(router, (hop.icmp_burst, self.now))
+        tokens = min(hop.icmp_burst,
+                     tokens + (self.now - then) * hop.icmp_rate)
+        allowed = tokens >= 1
+        self._tokens[router] = (tokens - 1 if allowed else tokens, self.now)
+        return allowed
+
+    def receive(self) -> tuple[bytes, tuple[str, int]]:
+        """ Waits for the next reply and returns it. """
+        arrival, _, reply, address = heapq.heappop(self.pending)
+        self.now = max(self.now, arrival)
+        return reply, address
+
+    def select(self) -> bool:
+        """ Waits up to SELECT_TIMEOUT for a reply; True if one came. """
+        if self.pending and \
+                self.pending[0][0] <= self.now + util.SELECT_TIMEOUT:
+            self.now = max(self.now, self.pending[0][0])
+            return True
+        self.now += util.SELECT_TIMEOUT
+        self.timeouts += 1
+        return False
+
+
+class FakeSocket:
+    """ Has the same methods as util.Socket, but uses a FakeNetwork. """
+
+    def __init__(self, net: FakeNetwork):
+        self.net = net
+        self.ttl = 64
+
+    def set_ttl(self, ttl: int):
+        self.ttl = ttl
+
+    def sendto(self, b: bytes, address: tuple[str, int]) -> int:
+        self.net.send(b, address, self.ttl)
+        return len(b)
+
+    def recvfrom(self) -> tuple[bytes, tuple[str, int]]:
+        return self.net.receive()
+
+    def recv_select(self) -> bool:
+        return self.net.select()
+
+
+if __name__ == '__main__':
+    import traceroute
+
+    util.set_resolver(util.Resolver(lookup=lambda ip: None))  # No DNS either
+    routers = ["10.0.0.1", None, "10.0.2.1", None, None, "10.0.5.1"]
+    dst = "10.0.9.9"
+    for run in (traceroute.traceroute, traceroute.traceroute_parallel):
+        print(f"{run.__name__}:")
+        net = FakeNetwork(routers, dst)
+        path = run(net.udp_socket(), net.icmp_socket(), dst)
+        util.flush_results()
+        print(f"{net.sent} probes, {net.timeouts} timeouts, "
+              f"{net.now:.1f}s; {path}")
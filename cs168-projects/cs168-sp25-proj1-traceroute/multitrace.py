@@ -0,0 +1,219 @@
+""" Traceroute to lots of destinations at once.
+
+The Engine traces every target concurrently, using one UDP socket for all
+the probes and one ICMP socket for all the replies.  Replies are handed to
+the right target by the destination IP and UDP port quoted in the ICMP
+error (probe ports are assigned as in traceroute.probe_port()).  At most
+`max_in_flight` probes are outstanding at once, shared fairly between the
+targets.
+
+The sockets only need util.Socket's methods.  If the receive socket has a
+fileno(), the engine waits on it with the event loop, and a probe is given
+up on SELECT_TIMEOUT seconds after it was sent.  Otherwise (e.g., the
+sockets from fakenet), recv_select() must not block: False means nothing
+else is coming, and everything in flight is given up on.
+
+Usage (needs root, like traceroute.py):
+    python multitrace.py host1 host2 ...
+"""
+
+import asyncio
+import collections
+import sys
+import typing
+
+import traceroute
+import util
+
+
+class Trace:
+    """ The state of the traceroute to one target. """
+
+    def __init__(self, ip: str, max_ttl: int, attempts: int):
+        self.ip = ip
+        self.max_ttl = max_ttl
+        self.attempts = attempts
+        self.routers = [set() for _ in range(max_ttl)]
+        self.outstanding = [0] * max_ttl  # Probes in flight per TTL
+        self.sent = 0  # Probes sent so far, TTL by TTL
+        self.dst_ttl = None  # Smallest TTL that reached `ip`
+
+    @property
+    def last_ttl(self) -> int:
+        """ The largest TTL we still care about. """
+        return self.dst_ttl or self.max_ttl
+
+    def next_probe(self) -> typing.Optional[tuple[int, int]]:
+        """ Returns (ttl, attempt) for the next probe, or None if done. """
+        if self.sent >= self.last_ttl * self.attempts:
+            return None
+        ttl, attempt = divmod(self.sent, self.attempts)
+        self.sent += 1
+        self.outstanding[ttl] += 1
+        return ttl + 1, attempt
+
+    def reply(self, ttl: int, router: str):
+        self.outstanding[ttl - 1] -= 1
+        if router == self.ip:
+            if self.dst_ttl is None or ttl < self.dst_ttl:
+                self.dst_ttl = ttl
+        else:
+            self.routers[ttl - 1].add(router)
+
+    def timeout(self, ttl: int):
+        self.outstanding[ttl - 1] -= 1
+
+    @property
+    def done(self) -> bool:
+        return self.sent >= self.last_ttl * self.attempts and \
+            not any(self.outstanding[:self.last_ttl])
+
+    def result(self) -> list[list[str]]:
+        """ The discovered path, in the same form traceroute() returns. """
+        if self.dst_ttl is None:
+            return [list(r) for r in self.routers]
+        return [list(r) for r in self.routers[:self.dst_ttl - 1]] + [[self.ip]]
+
+
+class Engine:
+    def __init__(self, sendsock, recvsock, max_in_flight: int = 256,
+                 timeout: float = util.SELECT_TIMEOUT,
+                 max_ttl: int = traceroute.TRACEROUTE_MAX_TTL,
+                 attempts: int = traceroute.PROBE_ATTEMPT_COUNT):
+        self.sendsock = sendsock
+        self.recvsock = recvsock
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.max_ttl = max_ttl
+        self.attempts = attempts
+        self.probes_sent = 0
+        self.replies = 0
+
+    async def run(self, targets: typing.Iterable[str],
+                  on_done: typing.Callable[[Trace], None] = None) \
+            -> dict[str, list[list[str]]]:
+        """ Traces all the targets and returns {target: path}.
+
+        If given, on_done(trace) is called as each trace finishes.
+        """
+        traces = {}
+        for ip in targets:
+            traces.setdefault(ip, Trace(ip, self.max_ttl, self.attempts))
+        self._traces = traces
+        self._on_done = on_done
+        self._ready = collections.deque(traces.values())  # Have probes to send
+        self._unfinished = set(traces)
+        self._in_flight = {}  # (ip, port) -> (Trace, ttl)
+        self._deadlines = collections.deque()  # (deadline, (ip, port))
+        self._ttl = None  # The send socket's current TTL
+
+        loop = asyncio.get_running_loop()
+        fileno = getattr(self.recvsock, "fileno", None)
+        self._wakeup = asyncio.Event()
+        if fileno is not None:
+            loop.add_reader(fileno(), self._on_readable)
+        try:
+            while self._unfinished:
+                self._send_probes(loop.time())
+                if fileno is not None:
+                    await self._wait(loop)
+                    self._expire(loop.time())
+                else:
+                    if self.recvsock.recv_select():
+                        self._receive()
+                    else:
+                        self._expire(None)
+                    await asyncio.sleep(0)  # Let other tasks run
+        finally:
+            if fileno is not None:
+                loop.remove_reader(fileno())
+        return dict((ip, t.result()) for ip, t in traces.items())
+
+    def _send_probes(self, now: float):
+        ready = self._ready
+        while ready and len(self._in_flight) < self.max_in_flight:
+            trace = ready.popleft()
+            probe = trace.next_probe()
+            if probe is None:
+                self._check_done(trace)
+                continue
+            ttl, attempt = probe
+            port = traceroute.probe_port(ttl, attempt)
+            if self._ttl != ttl:
+                self.sendsock.set_ttl(ttl)
+                self._ttl = ttl
+            self.sendsock.sendto(f"TracerouteProbe-{ttl}".encode(),
+                                 (trace.ip, port))
+            self.probes_sent += 1
+            self._in_flight[(trace.ip, port)] = (trace, ttl)
+            self._deadlines.append((now + self.timeout, (trace.ip, port)))
+            ready.append(trace)
+
+    async def _wait(self, loop):
+        """ Waits for a reply or for the oldest probe to time out. """
+        timeout = None
+        if self._deadlines:
+            timeout = max(0, self._deadlines[0][0] - loop.time())
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    def _on_readable(self):
+        self._receive()
+        self._wakeup.set()
+
+    def _receive(self):
+        buf, address = self.recvsock.recvfrom()
+        reply = traceroute.parse_reply(buf)
+        if reply is None:
+            return
+        _, ip, port = reply
+        probe = self._in_flight.pop((ip, port), None)
+        if probe is None:
+            return  # Not ours, a duplicate, or too late
+        self.replies += 1
+        trace, ttl = probe
+        trace.reply(ttl, address[0])
+        self._check_done(trace)
+
+    def _expire(self, now: typing.Optional[float]):
+        """ Gives up on probes sent before now (or on all of them). """
+        deadlines = self._deadlines
+        while deadlines and (now is None or deadlines[0][0] <= now):
+            _, key = deadlines.popleft()
+            probe = self._in_flight.pop(key, None)
+            if probe is not None:
+                trace, ttl = probe
+                trace.timeout(ttl)
+                self._check_done(trace)
+
+    def _check_done(self, trace: Trace):
+        if trace.ip in self._unfinished and trace.done:
+            self._unfinished.discard(trace.ip)
+            if self._on_done is not None:
+                self._on_done(trace)
+
+
+def trace_all(sendsock, recvsock, targets: typing.Iterable[str], **kw) \
+        -> dict[str, list[list[str]]]:
+    """ Runs an Engine to completion.  Takes the same options as Engine. """
+    return asyncio.run(Engine(sendsock, recvsock, **kw).run(targets))
+
+
+if __name__ == '__main__':
+    hosts = sys.argv[1:]
+    if not hosts:
+        print(f"usage: {sys.argv[0]} host [host ...]")
+        sys.exit(1)
+    ips = dict((util.gethostbyname(h), h) for h in hosts)
+
+    def show(trace: Trace):
+        util.print_line(f"traceroute to {ips[trace.ip]} ({trace.ip})")
+        for ttl, routers in enumerate(trace.result(), 1):
+            util.print_result(routers, ttl)
+
+    engine = Engine(util.Socket.make_udp(), util.Socket.make_icmp())
+    asyncio.run(engine.run(ips, on_done=show))
+    util.flush_results()
@@ -0,0 +1,60 @@
+""" How many ICMP replies per second can we parse?
+
+Times traceroute.parse_reply() on a time exceeded message, two ways:
+
+    copy      -- slicing out every header before parsing it (how parsing
+                 used to work)
+    in place  -- unpacking each header at its offset in the reply
+
+Receiving into one preallocated buffer instead of a fresh `bytes` per reply
+was tried too, and was no faster (within noise, sometimes slower): at this
+size, allocating the reply is not where the time goes.
+
+Usage:
+    python parse_bench.py [replies]
+"""
+
+import sys
+import time
+
+import fakenet
+import traceroute
+import util
+
+
+def parse_copying(buf: bytes):
+    """ parse_reply(), but slicing out each header before parsing it. """
+    ipv4 = traceroute.IPv4(buf[:20])
+    if ipv4.proto != util.IPPROTO_ICMP:
+        return None
+    offset = ipv4.header_len
+    icmp = traceroute.ICMP(buf[offset:])
+    if icmp.type not in (3, 11) or (icmp.type == 11 and icmp.code != 0):
+        return None
+    offset += 8
+    embedded_ip = traceroute.IPv4(buf[offset:])
+    if embedded_ip.proto != util.IPPROTO_UDP:
+        return None
+    embedded_udp = traceroute.UDP(buf[offset + embedded_ip.header_len:])
+    return icmp, embedded_ip.dst, embedded_udp.dst_port
+
+
+def bench(name: str, n: int, parse, receive):
+    start = time.perf_counter()
+    for _ in range(n):
+        parse(receive())
+    elapsed = time.perf_counter() - start
+    print(f"{name: <9} {n / elapsed: >12,.0f} replies/sec")
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    reply = fakenet.icmp_error("10.0.0.1", 11, 0, "10.0.9.9",
+                               traceroute.probe_port(5, 1), 1, 20)
+
+    def receive() -> bytes:
+        return bytes(reply)  # recvfrom() allocates a new one every time
+
+    assert parse_copying(reply)[1:] == traceroute.parse_reply(reply)[1:]
+    bench("copy", n, parse_copying, receive)
+    bench("in place", n, traceroute.parse_reply, receive)
@@ -0,0 +1,115 @@
+""" Benchmarks traceroute strategies on simulated networks.
+
+Builds random paths with fakenet (latency, loss, silent and rate limited
+routers, load balancing and duplicate replies) and traces them with
+traceroute_parallel() one target at a time, and with multitrace's Engine
+all at once.  For each, reports how fast the simulation ran, how long the
+real thing would have taken, and how accurate the results were:
+
+    found    -- fraction of targets whose trace reached them
+    correct  -- fraction of hops (up to the destination) reported without
+                any router that isn't really there
+    complete -- fraction of responsive routers that were reported
+
+The paths are the same for a given --seed, so this doubles as a
+regression test: the accuracy numbers should only change on purpose.
+
+Usage:
+    python sim_bench.py [--targets N] [--seed SEED]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import random
+import time
+
+import fakenet
+import multitrace
+import traceroute
+import util
+
+
+def random_path(rand: random.Random, i: int) -> tuple[list[fakenet.Hop], str]:
+    """ A made up path to a made up destination. """
+    hops = []
+    for ttl in range(1, rand.randint(6, 20)):
+        width = rand.choice([1, 1, 1, 1, 2, 3])  # Load balanced sometimes
+        routers = [f"172.{16 + ttl}.{i % 256}.{k}" for k in range(width)]
+        if rand.random() < 0.1:
+            routers = [None]
+        hops.append(fakenet.Hop(
+            routers,
+            latency=rand.uniform(0.0005, 0.02),
+            loss=rand.choice([0, 0, 0, 0.01, 0.05]),
+            icmp_rate=rand.choice([None, None, 50, 10]),
+            icmp_burst=rand.choice([5, 10]),
+            duplicate=rand.choice([0, 0, 0.01])))
+    return hops, f"10.{i // 256 % 256}.{i % 256}.1"
+
+
+def score(net: fakenet.FakeNetwork, results: dict[str, list[list[str]]]) \
+        -> tuple[float, float, float]:
+    """ Returns (found, correct, complete) as described at the top. """
+    found = hops = correct = routers = reported = 0
+    for dst, path in results.items():
+        real = net.paths[dst]
+        if path and path[-1] == [dst]:
+            found += 1
+        for ttl, got in enumerate(path[:len(real)], 1):
+            want = set(r for r in real[ttl - 1].routers if r is not None)
+            hops += 1
+            correct += set(got) <= want
+            routers += len(want)
+            reported += len(want & set(got))
+    return found / len(results), correct / hops, reported / routers
+
+
+def run_parallel(net: fakenet.FakeNetwork, targets: list[str]) \
+        -> dict[str, list[list[str]]]:
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for dst in targets:
+            results[dst] = traceroute.traceroute_parallel(
+                net.udp_socket(), net.icmp_socket(), dst)
+        util.flush_results()
+    return results
+
+
+def run_engine(net: fakenet.FakeNetwork, targets: list[str]) \
+        -> dict[str, list[list[str]]]:
+    engine = multitrace.Engine(net.udp_socket(), net.icmp_socket(),
+                               max_in_flight=1024)
+    return asyncio.run(engine.run(targets))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--targets', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    rand = random.Random(args.seed)
+    paths = [random_path(rand, i) for i in range(args.targets)]
+    util.set_resolver(util.Resolver(lookup=lambda ip: None))
+
+    print(f"{'strategy': <10} {'traces/s': >9} {'simulated': >10} "
+          f"{'probes': >7} {'found': >6} {'correct': >8} {'complete': >9}")
+    for name, run in (("parallel", run_parallel), ("engine", run_engine)):
+        net = fakenet.FakeNetwork(*paths[0], seed=args.seed)
+        for hops, dst in paths[1:]:
+            net.add_path(hops, dst)
+        targets = [dst for _, dst in paths]
+
+        start = time.perf_counter()
+        results = run(net, targets)
+        elapsed = time.perf_counter() - start
+
+        found, correct, complete = score(net, results)
+        print(f"{name: <10} {len(targets) / elapsed: >9,.0f} "
+              f"{net.now: >9.1f}s {net.sent: >7} {found: >6.1%} "
+              f"{correct: >8.1%} {complete: >9.1%}")
@@ -1,5 +1,6 @@
 import util
 import struct
+import typing
 
 # Your program should send TTLs in the range [1, TRACEROUTE_MAX_TTL] inclusive.
 # Technically IPv4 supports TTLs up to 255, but in practice this is excessive.
@@ -19,6 +20,13 @@ TRACEROUTE_PORT_NUMBER = 33434  # Cisco traceroute port number.
 # single router before giving up and moving on.
 PROBE_ATTEMPT_COUNT = 3
 
+# Header layouts, compiled once.  The parsers below decode straight out of the
+# buffer they're given (bytes, bytearray or memoryview) at an offset, so
+# nothing gets sliced or copied on the way.
+IPV4_HEADER = struct.Struct("!BBHHHBBH4s4s")
+ICMP_HEADER = struct.Struct("!BBH")
+UDP_HEADER = struct.Struct("!HHHH")
+
 class IPv4:
     # Each member below is a field from the IPv4 packet header.  They are
     # listed below in the order they appear in the packet.  All fields should
@@ -38,10 +46,10 @@ class IPv4:
     src: str
     dst: str
 
-    def __init__(self, buffer: bytes):
-        if len(buffer) < 20:
+    def __init__(self, buffer: bytes, offset: int = 0):
+        if len(buffer) - offset < 20:
             raise ValueError("IPv4 header too short")
-        unpacked = struct.unpack("!BBHHHBBH4s4s", buffer[:20])
+        unpacked = IPV4_HEADER.unpack_from(buffer, offset)
 
         self.version = unpacked[0] >> 4
         self.header_len = (unpacked[0] & 0x0F) * 4
@@ -76,10 +84,10 @@ class ICMP:
     code: int
     cksum: int
 
-    def __init__(self, buffer: bytes):
-        if len(buffer) < 8:
+    def __init__(self, buffer: bytes, offset: int = 0):
+        if len(buffer) - offset < 8:
             raise ValueError("ICMP header too short")
-        unpacked = struct.unpack("!BBH", buffer[:4])
+        unpacked = ICMP_HEADER.unpack_from(buffer, offset)
         self.type = unpacked[0]
         self.code = unpacked[1]
         self.cksum = unpacked[2]
@@ -100,11 +108,11 @@ class UDP:
     len: int
     cksum: int
 
-    def __init__(self, buffer: bytes):
-        if len(buffer) < 8:
+    def __init__(self, buffer: bytes, offset: int = 0):
+        if len(buffer) - offset < 8:
             raise ValueError("UDP header too short")
         
-        unpacked = struct.unpack("!HHHH", buffer[:8])
+        unpacked = UDP_HEADER.unpack_from(buffer, offset)
         self.src_port = unpacked[0]
         self.dst_port = unpacked[1]
         self.len = unpacked[2]
@@ -144,55 +152,38 @@ def traceroute(sendsock: util.Socket, recvsock: util.Socket, ip: str) \
         routers = set()
         responses_received = 0
         
-        for _ in range(PROBE_ATTEMPT_COUNT):
+        for attempt in range(PROBE_ATTEMPT_COUNT):
             probe_payload = f"TracerouteProbe-{ttl}".encode()
-            sendsock.sendto(probe_payload, (ip, TRACEROUTE_PORT_NUMBER))
+            sendsock.sendto(probe_payload, (ip, probe_port(ttl, attempt)))
         
         while recvsock.recv_select():
-            try:
-                buf, address = recvsock.recvfrom()
-                if len(buf) < 28:
-                    continue  
-                
-                ipv4_header = IPv4(buf[:20])
-                if ipv4_header.proto != 1:
-                    continue  
-                
-                header_offset = ipv4_header.header_len
-                icmp_packet = ICMP(buf[header_offset:])
-
-                if icmp_packet.type not in {11, 3} or (icmp_packet.type == 11 and icmp_packet.code != 0):
-                    continue  
-                
-                if len(buf) < header_offset + 28:
-                    continue  
-                embedded_ip = IPv4(buf[header_offset + 8:])
-
-                if embedded_ip.dst != ip:
-                    continue  
-                
-                packet_id = (embedded_ip.ttl, address[0], icmp_packet.type, icmp_packet.code)
-
-                if packet_id in seen_packets:
-                    continue  
-                seen_packets.add(packet_id)
-                
-                if embedded_ip.ttl != ttl:
-                    continue
-                
-                routers.add(address[0])
-                responses_received += 1
-
-                if responses_received >= PROBE_ATTEMPT_COUNT:
-                    break
-
-                if address[0] == ip:
-                    discovered_paths.append([ip])
-                    util.print_result([ip], ttl)
-                    return discovered_paths
-                
-            except ValueError:
+            buf, address = recvsock.recvfrom()
+            reply = parse_reply(buf)
+            if reply is None or reply[1] != ip:
+                continue
+            icmp_packet, _, port = reply
+
+            # Match replies to probes by the quoted UDP port, as
+            # traceroute_parallel() does.  The quoted IPv4 header has the
+            # probe's TTL as the router received it (usually 1), not the TTL
+            # it was sent with, so it can't tell TTLs apart.
+            if probe_ttl(port) != ttl:
+                continue
+
+            packet_id = (port, address[0], icmp_packet.type, icmp_packet.code)
+            if packet_id in seen_packets:
                 continue  
+            seen_packets.add(packet_id)
+
+            if address[0] == ip:
+                discovered_paths.append([ip])
+                util.print_result([ip], ttl)
+                return discovered_paths
+
+            routers.add(address[0])
+            responses_received += 1
+            if responses_received >= PROBE_ATTEMPT_COUNT:
+                break
 
         discovered_paths.append(list(routers))
         util.print_result(list(routers), ttl)
@@ -200,8 +191,108 @@ def traceroute(sendsock: util.Socket, recvsock: util.Socket, ip: str) \
     return discovered_paths
 
 
+def probe_port(ttl: int, attempt: int) -> int:
+    """ The UDP destination port for probe `attempt` (0-based) at `ttl`.
+
+    The parallel traceroute gives every probe its own port.  ICMP errors
+    quote the IPv4 header and first 8 bytes of the packet that caused them,
+    which includes the UDP ports, so the port tells us which probe a reply is
+    for.
+    """
+    return TRACEROUTE_PORT_NUMBER + (ttl - 1) * PROBE_ATTEMPT_COUNT + attempt
+
+
+def probe_ttl(port: int) -> typing.Optional[int]:
+    """ The inverse of probe_port(): the TTL a probe port was used for. """
+    offset = port - TRACEROUTE_PORT_NUMBER
+    if offset < 0 or offset >= TRACEROUTE_MAX_TTL * PROBE_ATTEMPT_COUNT:
+        return None
+    return offset // PROBE_ATTEMPT_COUNT + 1
+
+
+def parse_reply(buf: bytes) -> typing.Optional[tuple[ICMP, str, int]]:
+    """ Parses an ICMP error about one of our UDP probes.
+
+    Returns the ICMP header and the destination IP and UDP port of the probe
+    that the reply is about, or None if it isn't a reply we care about.  The
+    headers are read in place, so nothing is copied out of `buf`.
+    """
+    try:
+        ipv4 = IPv4(buf)
+        if ipv4.proto != util.IPPROTO_ICMP:
+            return None
+        offset = ipv4.header_len
+        icmp = ICMP(buf, offset)
+        if icmp.type not in (3, 11) or (icmp.type == 11 and icmp.code != 0):
+            return None
+        offset += 8
+        embedded_ip = IPv4(buf, offset)
+        if embedded_ip.proto != util.IPPROTO_UDP:
+            return None
+        embedded_udp = UDP(buf, offset + embedded_ip.header_len)
+    except ValueError:
+        return None
+    return icmp, embedded_ip.dst, embedded_udp.dst_port
+
+
+def traceroute_parallel(sendsock: util.Socket, recvsock: util.Socket, ip: str) \
+        -> list[list[str]]:
+    """ Like traceroute(), but probes every TTL at once.
+
+    All PROBE_ATTEMPT_COUNT probes for every TTL are sent up front, each to
+    its own port (see probe_port()), and replies are matched back to their
+    TTL by the port quoted in the ICMP error.  So instead of waiting up to
+    SELECT_TIMEOUT for each silent hop in turn, the whole trace takes about
+    one SELECT_TIMEOUT.  Returns the same kind of list as traceroute().
+    """
+
+    for ttl in range(1, TRACEROUTE_MAX_TTL + 1):
+        sendsock.set_ttl(ttl)
+        for attempt in range(PROBE_ATTEMPT_COUNT):
+            probe_payload = f"TracerouteProbe-{ttl}".encode()
+            sendsock.sendto(probe_payload, (ip, probe_port(ttl, attempt)))
+
+    routers = [set() for _ in range(TRACEROUTE_MAX_TTL)]
+    answered = set()  # Ports we've had replies for
+    dst_ttl = None  # Smallest TTL that reached `ip`
+
+    while recvsock.recv_select():
+        buf, address = recvsock.recvfrom()
+        reply = parse_reply(buf)
+        if reply is None or reply[1] != ip:
+            continue
+        icmp, _, port = reply
+        ttl = probe_ttl(port)
+        if ttl is None:
+            continue
+
+        answered.add(port)
+        if address[0] == ip:
+            if dst_ttl is None or ttl < dst_ttl:
+                dst_ttl = ttl
+        else:
+            routers[ttl - 1].add(address[0])
+
+        # Done once every probe up to the destination has been answered.
+        if dst_ttl is not None and all(
+                probe_port(t, a) in answered
+                for t in range(1, dst_ttl + 1)
+                for a in range(PROBE_ATTEMPT_COUNT)):
+            break
+
+    if dst_ttl is not None:
+        routers = routers[:dst_ttl - 1] + [[ip]]
+    discovered_paths = [list(r) for r in routers]
+    for ttl, path in enumerate(discovered_paths, 1):
+        util.print_result(path, ttl)
+    return discovered_paths
+
+
 if __name__ == '__main__':
     args = util.parse_args()
     ip_addr = util.gethostbyname(args.host)
     print(f"traceroute to {args.host} ({ip_addr})")
-    traceroute(util.Socket.make_udp(), util.Socket.make_icmp(), ip_addr)
+    util.set_resolver(util.Resolver(cache_file=args.dns_cache))
+    run = traceroute_parallel if args.parallel else traceroute
+    run(util.Socket.make_udp(), util.Socket.make_icmp(), ip_addr)
+    util.flush_results()
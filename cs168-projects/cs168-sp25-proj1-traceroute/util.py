@@ -1,6 +1,13 @@
 import argparse
+import collections
+import concurrent.futures
+import functools
+import json
+import os
 import select
 import socket
+import threading
+import time
 import typing
 import sys
 import platform
@@ -16,6 +23,9 @@ import platform
 # impacts real runs.
 SELECT_TIMEOUT = 2
 
+# The most bytes recvfrom() will return for one packet.
+RECV_SIZE = 4096
+
 IPPROTO_ICMP = socket.IPPROTO_ICMP
 
 IPPROTO_UDP = socket.IPPROTO_UDP
@@ -112,7 +122,7 @@ class Socket:
     #
     # See: https://docs.python.org/3/library/socket.html#socket.socket.recvfrom
     def recvfrom(self) -> typing.Tuple[bytes, typing.Tuple[str, int]]:
-        return self.__sock.recvfrom(4096)
+        return self.__sock.recvfrom(RECV_SIZE)
 
     # Only called on the ICMP socket.  Blocks until this socket has a packet
     # ready to be received by `recvfrom()`, or `SELECT_TIMEOUT` expires.
@@ -123,26 +133,225 @@ class Socket:
         rlist, _, _ = select.select([self.__sock], [], [], SELECT_TIMEOUT)
         return rlist != []
 
-
-def print_result(routers: list[str], ttl: int):
+    # The socket's file descriptor, so event loops can wait on it.
+    def fileno(self) -> int:
+        return self.__sock.fileno()
+
+
+# Reverse DNS answers (including "no name") are cached for DNS_CACHE_TTL
+# seconds.  At most DNS_CACHE_SIZE of them are kept, least recently used
+# first out, and up to DNS_THREADS lookups run at once.
+DNS_CACHE_TTL = 3600
+DNS_CACHE_SIZE = 4096
+DNS_THREADS = 16
+
+
+def reverse_lookup(ip: str) -> typing.Optional[str]:
+    """ The hostname for `ip`, or None if it doesn't have one. """
+    try:
+        hostname, _, _ = socket.gethostbyaddr(ip)
+    except (socket.herror, socket.gaierror):
+        return None
+    return hostname
+
+
+class Resolver:
+    """ Reverse DNS lookups on a thread pool, with a cache.
+
+    `lookup(ip)` does the actual work and returns a hostname or None; pass
+    your own to run offline.  If `cache_file` is given, the cache is loaded
+    from it now and written back to it by save() or close()
+    (util.flush_results() calls save()).
+    """
+
+    def __init__(self, lookup: typing.Callable[[str], typing.Optional[str]]
+                 = reverse_lookup, threads: int = DNS_THREADS,
+                 cache_size: int = DNS_CACHE_SIZE,
+                 cache_ttl: float = DNS_CACHE_TTL,
+                 cache_file: typing.Optional[str] = None,
+                 clock: typing.Callable[[], float] = time.time):
+        self.lookup = lookup
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.cache_file = cache_file
+        self.clock = clock
+        self.cache = collections.OrderedDict()  # ip -> (expires, hostname)
+        self.pending = {}  # ip -> Future for lookups in progress
+        self.lock = threading.Lock()
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            threads, thread_name_prefix="dns")
+        if cache_file is not None:
+            self.load()
+
+    def resolve(self, ip: str) -> concurrent.futures.Future:
+        """ Returns a Future for the hostname of `ip` (or None). """
+        with self.lock:
+            entry = self.cache.get(ip)
+            if entry is not None:
+                expires, hostname = entry
+                if expires > self.clock():
+                    self.cache.move_to_end(ip)
+                    future = concurrent.futures.Future()
+                    future.set_result(hostname)
+                    return future
+                del self.cache[ip]
+            future = self.pending.get(ip)
+            if future is not None:
+                return future
+            future = self.executor.submit(self.lookup, ip)
+            self.pending[ip] = future
+        # Outside the lock, since this runs _finished() now if it's done.
+        future.add_done_callback(functools.partial(self._finished, ip))
+        return future
+
+    def _finished(self, ip: str, future: concurrent.futures.Future):
+        with self.lock:
+            del self.pending[ip]
+            if future.exception() is not None:
+                return  # Don't cache failures; try again next time
+            self._store(ip, self.clock() + self.cache_ttl, future.result())
+
+    def _store(self, ip: str, expires: float, hostname: typing.Optional[str]):
+        self.cache[ip] = (expires, hostname)
+        self.cache.move_to_end(ip)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def load(self):
+        """ Adds the unexpired entries in `cache_file` to the cache. """
+        try:
+            with open(self.cache_file) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return  # Missing or corrupt; start from scratch
+        now = self.clock()
+        with self.lock:
+            for ip, (expires, hostname) in entries.items():
+                if expires > now and ip not in self.cache:
+                    self._store(ip, expires, hostname)
+
+    def save(self):
+        """ Writes the cache to `cache_file`, oldest entries first. """
+        with self.lock:
+            entries = dict((ip, list(e)) for ip, e in self.cache.items())
+        tmp = f"{self.cache_file}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp, self.cache_file)
+
+    def close(self):
+        """ Waits for lookups in progress, then saves the cache if needed. """
+        self.executor.shutdown(wait=True)
+        if self.cache_file is not None:
+            self.save()
+
+
+class ResultPrinter:
+    """ Prints each TTL's routers once their hostnames have been looked up.
+
+    add() starts the lookups and returns right away, so probing carries on
+    while DNS happens in the background.  TTLs are always printed in the
+    order they were added, each as soon as it and every TTL before it are
+    resolved.
+    """
+
+    def __init__(self, resolver: Resolver):
+        self.resolver = resolver
+        self.queue = collections.deque()  # (futures, show(hostnames))
+        self.lock = threading.Lock()
+
+    def add(self, routers: list[str], ttl: int):
+        futures = [self.resolver.resolve(router) for router in routers]
+        show = functools.partial(_print_hop, list(routers), ttl)
+        with self.lock:
+            self.queue.append((futures, show))
+        for future in futures:
+            future.add_done_callback(self._drain)
+        self._drain()
+
+    def add_line(self, line: str):
+        """ Prints `line` after everything added before it. """
+        with self.lock:
+            self.queue.append(([], lambda _: print(line)))
+        self._drain()
+
+    def _drain(self, _future=None):
+        with self.lock:
+            while self.queue and all(f.done() for f in self.queue[0][0]):
+                futures, show = self.queue.popleft()
+                show([None if f.exception() else f.result() for f in futures])
+
+    def flush(self):
+        """ Waits until everything added so far has been printed. """
+        with self.lock:
+            futures = [f for fs, _ in self.queue for f in fs]
+        concurrent.futures.wait(futures)
+        self._drain()
+
+
+def _print_hop(routers: list[str], ttl: int,
+               hostnames: list[typing.Optional[str]]):
     if len(routers) == 0:
         print(f"{ttl: >2}: *")
         return
 
-    for i, router in enumerate(routers):
+    for i, (router, hostname) in enumerate(zip(routers, hostnames)):
         if i == 0:
             preamble = f"{ttl: >2}:"
         else:
             preamble = "   "
 
-        try:
-            hostname, _, _ = socket.gethostbyaddr(router)
+        if hostname is not None:
             print(f"{preamble} {hostname} ({router})")
-        except socket.herror:
+        else:
             print(f"{preamble} {router}")
 
 
+_printer: typing.Optional[ResultPrinter] = None
+
+
+def set_resolver(resolver: Resolver):
+    """ Makes print_result() look up hostnames with `resolver`. """
+    global _printer
+    if _printer is not None:
+        _printer.flush()
+    _printer = ResultPrinter(resolver)
+
+
+def _get_printer() -> ResultPrinter:
+    if _printer is None:
+        set_resolver(Resolver())
+    return _printer
+
+
+# Prints the routers found at `ttl`, with their hostnames.  The hostnames are
+# looked up in the background, so the line may show up after this returns;
+# call flush_results() to wait for it.
+def print_result(routers: list[str], ttl: int):
+    _get_printer().add(routers, ttl)
+
+
+# Prints `line` once everything passed to print_result() before it has been
+# printed, e.g., a heading for the next trace.
+def print_line(line: str):
+    _get_printer().add_line(line)
+
+
+# Waits for everything passed to print_result() to be printed, and saves the
+# DNS cache if there is one.  The resolver stays in place, so a later run
+# carries on using whichever one set_resolver() installed.
+def flush_results():
+    if _printer is not None:
+        _printer.flush()
+        if _printer.resolver.cache_file is not None:
+            _printer.resolver.save()
+
+
 def parse_args():
     parser = argparse.ArgumentParser(prog='cs168 Traceroute')
     parser.add_argument('host')
+    parser.add_argument('--parallel', action='store_true',
+                        help="probe all TTLs at once")
+    parser.add_argument('--dns-cache', metavar='FILE',
+                        help="keep reverse DNS results in FILE across runs")
     return parser.parse_args()
@@ -31,6 +31,8 @@ class RoutePacket(api.Packet):
     The latter is the destination for which this is a route advertisement.
     """
 
+    __slots__ = ("latency", "destination")
+
     def __init__(self, destination, latency):
         super(RoutePacket, self).__init__()
         self.latency = latency
@@ -42,6 +44,26 @@ class RoutePacket(api.Packet):
         return "<RoutePacket to %s at cost %s>" % (self.destination, self.latency)
 
 
+class RouteBatchPacket(api.Packet):
+    """
+    Several DV route advertisements in one packet
+
+    .routes is a list of (destination, latency) pairs, each of which means
+    the same thing as a RoutePacket would.
+    """
+
+    __slots__ = ("routes",)
+
+    def __init__(self, routes):
+        super(RouteBatchPacket, self).__init__()
+        self.routes = routes
+        self.outer_color = [1, 0, 1, 1]
+        self.inner_color = [1, 0, 1, 1]
+
+    def __repr__(self):
+        return "<RouteBatchPacket with %s routes>" % (len(self.routes),)
+
+
 class Ports:
     def __init__(self):
         self.link_to_lat = {}
@@ -70,6 +92,10 @@ class DVRouterBase(api.Entity):
     TIMER_INTERVAL = 5  # Default timer interval.
     ROUTE_TTL = 15
 
+    # If True, send_route() doesn't send right away.  All the routes sent to
+    # a port while handling one event go out together in a RouteBatchPacket.
+    BATCH_ROUTES = False
+
     def start_timer(self, interval=None):
         """
         Start the timer that calls handle_timer()
@@ -82,7 +108,8 @@ class DVRouterBase(api.Entity):
             interval = self.TIMER_INTERVAL
             if interval is None:
                 return
-        api.create_timer(interval, self.handle_timer)
+        # Coalesced so that all the routers share one event per tick.
+        api.create_timer(interval, self.handle_timer, coalesce=True)
 
     def handle_rx(self, packet, port):
         """
@@ -97,11 +124,42 @@ class DVRouterBase(api.Entity):
         if isinstance(packet, RoutePacket):
             self.expire_routes()
             self.handle_route_advertisement(packet.destination, packet.latency, port)
+        elif isinstance(packet, RouteBatchPacket):
+            self.expire_routes()
+            for dst, latency in packet.routes:
+                self.handle_route_advertisement(dst, latency, port)
         elif isinstance(packet, HostDiscoveryPacket):
             self.add_static_route(packet.src, port)
         else:
             self.handle_data_packet(packet, port)
 
+    def handle_rx_batch(self, packets, port):
+        """
+        Called by the framework when several packets arrive at once.
+
+        Like handle_rx(), except that routes only get expired once for the
+        whole bunch (they all arrived at the same time, after all).
+
+        !!! DO NOT OVERRIDE THIS METHOD !!!
+        """
+        expired = False
+        for packet in packets:
+            if isinstance(packet, RoutePacket):
+                if not expired:
+                    self.expire_routes()
+                    expired = True
+                self.handle_route_advertisement(
+                    packet.destination, packet.latency, port
+                )
+            elif isinstance(packet, RouteBatchPacket):
+                if not expired:
+                    self.expire_routes()
+                    expired = True
+                for dst, latency in packet.routes:
+                    self.handle_route_advertisement(dst, latency, port)
+            else:
+                self.handle_rx(packet, port)
+
     def handle_timer(self):
         """
         Called periodically when the router should send tables to neighbors
@@ -139,10 +197,24 @@ class DVRouterBase(api.Entity):
         """
         Creates a control packet from dst and lat and sends it.
         """
+        if self.BATCH_ROUTES:
+            batches = getattr(self, "_route_batches", None)
+            if not batches:
+                batches = self._route_batches = {}
+                api.create_timer(0, self._send_route_batches, recurring=False)
+            # A later route for the same destination replaces an earlier one
+            batches.setdefault(port, {})[dst] = latency
+            return
 
         pkt = RoutePacket(destination=dst, latency=latency)
         self.send(pkt, port=port)
 
+    def _send_route_batches(self):
+        batches = self._route_batches
+        self._route_batches = {}
+        for port, routes in batches.items():
+            self.send(RouteBatchPacket(list(routes.items())), port=port)
+
     def s_log(self, format, *args):
         """
         Logs the only these messages, if the node is selected
@@ -164,6 +236,8 @@ class DVRouterBase(api.Entity):
 
 # import abc
 from collections import namedtuple
+import heapq
+import itertools
 from numbers import Number  # Available in Python >= 2.7.
 import unittest
 
@@ -175,6 +249,8 @@ from sim.api import HostEntity, get_name, current_time
 FOREVER = float("+inf")  # Denotes forever in time.
 INFINITY = 100
 
+_NUMBERS = (int, float)
+
 # FIXME: Make FOREVER an internal thing and fix the way it gets formatted in __str__?
 #       Instead, have expiration time = None (a default?) mean forever?  (Internally,
 #       we may want to set it to +inf just because that should do the right thing?)
@@ -214,6 +290,108 @@ class Table(_ValidatedDict):
 
     owner = None
 
+    def __init__(self, *args, **kwargs):
+        # Expiry index: a heap of (expire_time, seq, dst, entry).  Entries
+        # are never removed from it when they're replaced or deleted from
+        # the table; expired() just skips the ones that are stale.
+        self._expiry = []
+        self._expiry_seq = itertools.count()
+        # Destinations set or deleted since the last pop_changed().  It's a
+        # dict (with None values) so that it remembers the order.
+        self._changed = {}
+        super(Table, self).__init__(*args, **kwargs)
+        for dst, entry in self.items():
+            self._index(dst, entry)
+
+    def __setitem__(self, dst, entry):
+        super(Table, self).__setitem__(dst, entry)
+        self._index(dst, entry)
+
+    def __delitem__(self, dst):
+        super(Table, self).__delitem__(dst)
+        self._changed[dst] = None
+
+    def update(self, *args, **kwargs):
+        # Only the entries actually given count as changed.
+        new = dict(*args, **kwargs)
+        super(Table, self).update(new)
+        for dst, entry in new.items():
+            self._index(dst, entry)
+
+    # The rest of dict's mutators have to go through the methods above too,
+    # or the changes would never be reported by pop_changed().
+
+    def pop(self, dst, *default):
+        if dst not in self:
+            if default:
+                return default[0]
+            raise KeyError(dst)
+        entry = self[dst]
+        del self[dst]
+        return entry
+
+    def popitem(self):
+        dst, entry = super(Table, self).popitem()
+        self._changed[dst] = None
+        return dst, entry
+
+    def setdefault(self, dst, default=None):
+        if dst not in self:
+            self[dst] = default
+        return self[dst]
+
+    def clear(self):
+        for dst in self:
+            self._changed[dst] = None
+        super(Table, self).clear()
+        self._expiry = []
+
+    def pop_changed(self):
+        """
+        Returns the destinations set or deleted since the last call
+
+        They come back as a dict with None values, in the order they were
+        first changed.
+        """
+        changed = self._changed
+        self._changed = {}
+        return changed
+
+    def _index(self, dst, entry):
+        self._changed[dst] = None
+        if entry.expire_time == FOREVER:
+            return
+        heapq.heappush(
+            self._expiry, (entry.expire_time, next(self._expiry_seq), dst, entry)
+        )
+        if len(self._expiry) > 4 * len(self) + 64:
+            # Mostly stale; rebuild it from what's actually in the table.
+            self._expiry = [
+                (e.expire_time, next(self._expiry_seq), d, e)
+                for d, e in self.items()
+                if e.expire_time != FOREVER
+            ]
+            heapq.heapify(self._expiry)
+
+    def expired(self, now):
+        """
+        Returns the destinations whose entries expire at or before now
+
+        Only looks at entries that have actually expired, rather than
+        scanning the whole table.  The destinations are in expiry order.
+        Each entry is only reported once, so the caller should remove or
+        replace it.
+        """
+        expiry = self._expiry
+        dsts = []
+        seen = set()
+        while expiry and expiry[0][0] <= now:
+            _, _, dst, entry = heapq.heappop(expiry)
+            if self.get(dst) is entry and dst not in seen:
+                seen.add(dst)
+                dsts.append(dst)
+        return dsts
+
     def validate(self, dst, entry):
         """Raises ValueError if dst and entry have incorrect types."""
         if not isinstance(dst, HostEntity):
@@ -253,6 +431,8 @@ class TableEntry(namedtuple("TableEntry", ["dst", "port", "latency", "expire_tim
       )
     """
 
+    __slots__ = ()  # Routers keep lots of these; don't give each a __dict__.
+
     def __new__(cls, dst, port, latency, expire_time):
         """
         Creates a peer table entry, denoting a route advertised by a neighbor.
@@ -271,10 +451,12 @@ class TableEntry(namedtuple("TableEntry", ["dst", "port", "latency", "expire_tim
         if not isinstance(port, int):
             raise ValueError("Provided port %s is not an integer" % (port,))
 
-        if not isinstance(expire_time, Number):
+        # Checking the common types first is much faster than isinstance()
+        # against the Number ABC.
+        if type(expire_time) not in _NUMBERS and not isinstance(expire_time, Number):
             raise ValueError("Provided expire time %s is not a number" % (expire_time,))
 
-        if not isinstance(latency, Number):
+        if type(latency) not in _NUMBERS and not isinstance(latency, Number):
             raise ValueError("Provided latency %s is not a number" % latency)
 
         self = super(TableEntry, cls).__new__(cls, dst, port, latency, expire_time)
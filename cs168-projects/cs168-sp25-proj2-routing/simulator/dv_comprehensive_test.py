@@ -15,18 +15,31 @@ import sim.api as api
 from sim.basics import Ping
 import sim.cable
 
-from dv_comprehensive_test_utils import all_hosts, all_cables
+from dv_comprehensive_test_utils import all_hosts, all_cables, stats
+
+# Outcome of the run, filled in as the test goes (used by dv_sweep)
+results = {}
 
 
 def pick_action(g, rand):
     """Randomly picks a valid action (add / remove link)."""
+
+    def edge(u, v):
+        # networkx hands back edges in whatever orientation set iteration
+        # gives it, which depends on the hash seed.  Normalize them so that
+        # a given seed always picks the same actions.
+        return (u, v) if u <= v else (v, u)
+
     actions = []
     # We can remove any edge as long as the removal doesn't cause a partition.
-    actions.extend(("del", u, v) for u, v in set(g.edges) - set(nx.bridges(g)))
+    bridges = set(edge(u, v) for u, v in nx.bridges(g))
+    actions.extend(
+        ("del",) + e for e in set(edge(u, v) for u, v in g.edges) - bridges
+    )
     # We can add any router-to-router edge that doesn't exist yet.
     # Hosts are ignored since we can't connect a host to multiple routers.
     actions.extend(
-        ("add", u, v)
+        ("add",) + edge(u, v)
         for u, v in nx.non_edges(g)
         if (
             not isinstance(g.nodes[u]["entity"], api.HostEntity)
@@ -39,27 +52,55 @@ def pick_action(g, rand):
     return rand.choice(actions)
 
 
-def launch(seed=None):
+def launch(seed=None, rounds=None, batch_routes=False, batch_delivery=False):
+    """
+    Runs rounds of random link changes, checking pings after each round
+
+    Stops at the first failure, or after *rounds* successful rounds if
+    given (otherwise it keeps going forever).  If *batch_routes*, routers
+    send their advertisements in RouteBatchPackets.  If *batch_delivery*,
+    cables hand routers everything that arrives at once in one batch.
+    """
     # Seed the RNG.
     rand = Random()
     if seed is not None:
         rand.seed(float(seed))
+    if rounds is not None:
+        rounds = int(rounds)
 
     sim.config.default_switch_type.POISON_REVERSE = True
     sim.config.default_switch_type.POISON_EXPIRED = True
     sim.config.default_switch_type.SPLIT_HORIZON = False
     sim.config.default_switch_type.POISON_ON_LINK_DOWN = True
     sim.config.default_switch_type.SEND_ON_LINK_UP = True
+    sim.config.default_switch_type.BATCH_ROUTES = bool(batch_routes)
 
-    # Make sure that each cable has a transmission time of zero.
+    # Make sure that each cable has a transmission time of zero, and set the
+    # delivery mode on the cables we have now and the ones created later.
+    sim.cable.BasicCable.DEFAULT_BATCH_DELIVERY = bool(batch_delivery)
     for c in all_cables:
         assert c.tx_time == 0, "BUG: cable {} has non-zero transmission time {}".format(
             c, c.tx_time
         )
+        c.batch = bool(batch_delivery)
+
+    results.update(
+        seed=seed,
+        passed=False,
+        rounds=0,
+        failure=None,
+        sim_time=None,
+        convergence=[],  # Per round: last route change after last action
+    )
+
+    def fail(msg, *args):
+        api.simlog.error(msg, *args)
+        results["failure"] = (msg % args).strip()
 
     def comprehensive_test_tasklet():
         """Comprehensive test."""
         successes = 0
+        start_time = api.current_time()
 
         try:
             yield 0
@@ -105,11 +146,17 @@ def launch(seed=None):
                         g.nodes[u]["entity"].linkTo(g.nodes[v]["entity"])
                     else:
                         assert False, "unknown action {}".format(action)
+                last_action_time = api.current_time()
 
                 # Wait for convergence.
                 max_latency = nx.diameter(g) * 1.01
                 yield max_latency
 
+                last_change = stats["last_route_change"]
+                if last_change is None or last_change < last_action_time:
+                    last_change = last_action_time
+                results["convergence"].append(last_change - last_action_time)
+
                 # Send pair-wise pings.
                 assert nx.is_connected(g), "BUG: network partition"
                 expected = defaultdict(dict)  # dst -> src -> time
@@ -133,15 +180,13 @@ def launch(seed=None):
                     rxed = dst.rxed_pings
                     for src in set(expected[dst].keys()) | set(rxed.keys()):
                         if src not in rxed:
-                            api.simlog.error(
-                                "\tFAILED: Missing ping: %s -> %s", src, dst
-                            )
+                            fail("\tFAILED: Missing ping: %s -> %s", src, dst)
                             return
 
                         assert rxed[src]
                         rx_packets = [packet for packet, _ in rxed[src]]
                         if src not in expected[dst]:
-                            api.simlog.error(
+                            fail(
                                 "\tFAILED: Extraneous ping(s): %s -> %s %s",
                                 src,
                                 dst,
@@ -150,7 +195,7 @@ def launch(seed=None):
                             return
 
                         if len(rx_packets) > 1:
-                            api.simlog.error(
+                            fail(
                                 "\tFAILED: Duplicate ping(s): %s -> %s %s",
                                 src,
                                 dst,
@@ -161,7 +206,7 @@ def launch(seed=None):
                         rx_packet = rx_packets[0]
                         assert isinstance(rx_packet, Ping)
                         if rx_packet.data != round:
-                            api.simlog.error(
+                            fail(
                                 "\tFAILED: Ping NOT from current round %d: %s -> %s %s",
                                 round,
                                 src,
@@ -173,7 +218,7 @@ def launch(seed=None):
                         _, actual_time = rxed[src][0]
                         late = actual_time - expected[dst][src]
                         if late > 0:
-                            api.simlog.error(
+                            fail(
                                 "\tFAILED: Ping late by %g sec: %s -> %s %s",
                                 actual_time - deadline[dst][src],
                                 src,
@@ -186,10 +231,15 @@ def launch(seed=None):
 
                 api.simlog.info("\tSUCCESS!")
                 successes += 1
+                results["rounds"] = successes
+                if rounds is not None and successes >= rounds:
+                    results["passed"] = True
+                    break
         except Exception as e:
-            api.simlog.error("Exception occurred: %s" % e)
+            fail("Exception occurred: %s", e)
             traceback.print_exc()
         finally:
+            results["sim_time"] = api.current_time() - start_time
             sys.exit()
 
     api.run_tasklet(comprehensive_test_tasklet)
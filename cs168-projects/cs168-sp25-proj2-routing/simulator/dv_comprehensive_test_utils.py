@@ -1,6 +1,6 @@
 from collections import defaultdict
 import weakref
-from cs168.dv import RoutePacket
+from cs168.dv import RoutePacket, RouteBatchPacket, Table, INFINITY
 import sim.api as api
 from sim.basics import BasicHost, Ping
 import sim.cable
@@ -8,6 +8,13 @@ import sim.cable
 all_hosts = set()
 all_cables = weakref.WeakSet()
 
+# Counters for the whole run (used by dv_sweep)
+stats = {
+    "packets": 0,  # Packets put on a cable
+    "route_packets": 0,  # ... of which were route advertisements
+    "last_route_change": None,  # When a route's port or latency last changed
+}
+
 
 class TestHost(BasicHost):
     ENABLE_PONG = False
@@ -26,7 +33,7 @@ class TestHost(BasicHost):
         self.rxed_pings.clear()
 
     def handle_rx(self, packet, port):
-        if isinstance(packet, RoutePacket):
+        if isinstance(packet, (RoutePacket, RouteBatchPacket)):
             self.routes += 1
         elif isinstance(packet, Ping):
             self.rxed_pings[packet.src].append((packet, api.current_time()))
@@ -56,7 +63,48 @@ def _set_up_cable_tracking():
     sim.cable.Cable.__new__ = staticmethod(new_new)
 
 
+def _set_up_packet_counting():
+    old_transfer = sim.cable.BasicCable.transfer
+
+    def transfer(self, packet):
+        stats["packets"] += 1
+        if isinstance(packet, (RoutePacket, RouteBatchPacket)):
+            stats["route_packets"] += 1
+        return old_transfer(self, packet)
+
+    sim.cable.BasicCable.transfer = transfer
+
+
+def _route(entry):
+    """What a table entry means for forwarding (None if it's unusable)."""
+    if entry is None or entry.latency >= INFINITY:
+        return None
+    return (entry.port, entry.latency)
+
+
+def _set_up_route_tracking():
+    # Refreshing a route (same port and latency, later expiry) doesn't count
+    # as a change; neither does adding or removing a poisoned one.
+    old_setitem = Table.__setitem__
+    old_delitem = Table.__delitem__
+
+    def setitem(self, dst, entry):
+        if _route(self.get(dst)) != _route(entry):
+            stats["last_route_change"] = api.current_time()
+        return old_setitem(self, dst, entry)
+
+    def delitem(self, dst):
+        if _route(self.get(dst)) is not None:
+            stats["last_route_change"] = api.current_time()
+        return old_delitem(self, dst)
+
+    Table.__setitem__ = setitem
+    Table.__delitem__ = delitem
+
+
 _set_up_cable_tracking()
+_set_up_packet_counting()
+_set_up_route_tracking()
 sim.cable.BasicCable.DEFAULT_TX_TIME = 0
 
 
@@ -61,6 +61,10 @@ class DVRouter(DVRouterBase):
 
         self.history = {}
 
+        # Per port: destinations changed since we last advertised there
+        # incrementally (a dict with None values, to keep them in order).
+        self.pending = {}
+
         ##### End Stage 10A #####
 
     def add_static_route(self, host, port):
@@ -124,9 +128,28 @@ class DVRouter(DVRouterBase):
         ##### Begin Stages 3, 6, 7, 8, 10 #####
         
         ports_to_update = [single_port] if single_port else self.ports.get_all_ports()
-        
+
+        if not force:
+            # Only routes that changed since the last incremental update can
+            # need advertising again, so queue those up for every port.
+            pop_changed = getattr(self.table, "pop_changed", None)
+            changed = pop_changed() if pop_changed else dict.fromkeys(self.table)
+            for pending in self.pending.values():
+                pending.update(changed)
+
         for port in ports_to_update:
-            for dst, entry in self.table.items():
+            if force or port not in self.history:
+                # Nothing advertised here yet, so everything is new
+                dsts = list(self.table)
+            else:
+                dsts = self.pending[port]
+            if not force:
+                self.pending[port] = {}
+
+            for dst in dsts:
+                entry = self.table.get(dst)
+                if entry is None:
+                    continue
                 advertised_latency = min(entry.latency, INFINITY)  # Prevent counting to infinity
                 if self.SPLIT_HORIZON and entry.port == port:
                     continue  # Apply Split Horizon rule
@@ -153,7 +176,7 @@ class DVRouter(DVRouterBase):
         ##### Begin Stages 5, 9 #####
 
         current_time = api.current_time()
-        expired_routes = [dst for dst, entry in self.table.items() if entry.expire_time <= current_time]
+        expired_routes = self.table.expired(current_time)
         for dst in expired_routes:
             entry = self.table[dst]
             if self.POISON_EXPIRED:
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+"""
+Runs the comprehensive DV test over lots of random seeds in parallel
+
+Each seed gets a fresh process (the simulator is full of globals), runs
+headless in virtual time, and reports whether it passed, how many rounds it
+got through, how long routes took to settle after each round's link changes,
+and how many packets were sent.  Results can be written out as JSON and/or
+CSV, and the command to reproduce any failing seed is printed at the end.
+
+Example:
+  python dv_sweep.py --seeds=1000 --rounds=10 --json=sweep.json
+"""
+
+from __future__ import print_function
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import sys
+import time
+
+
+CSV_FIELDS = [
+    "seed",
+    "topo_seed",
+    "passed",
+    "rounds",
+    "failure",
+    "sim_time",
+    "wall_time",
+    "max_convergence",
+    "mean_convergence",
+    "packets",
+    "route_packets",
+]
+
+
+def _modules(seed, options):
+    """The (module, arguments) list that boot would get from a commandline."""
+    topo_seed = seed if options.topo_seed is None else options.topo_seed
+    modules = [
+        ("dv_comprehensive_test_utils", {}),
+        (
+            "topos.rand",
+            {"switches": options.switches, "links": options.links, "seed": topo_seed},
+        ),
+        ("dv_comprehensive_test", {"seed": seed, "rounds": options.rounds}),
+    ]
+    if options.batch_routes:
+        modules[-1][1]["batch_routes"] = True
+    if options.batch_delivery:
+        modules[-1][1]["batch_delivery"] = True
+    return modules
+
+
+def reproduce_command(seed, options):
+    """The simulator commandline which runs a single seed."""
+    cmd = [
+        "python simulator.py",
+        "--virtual-time",
+        "--no-interactive",
+        "--default-switch-type=" + options.router,
+        "--default-host-type=dv_comprehensive_test_utils.TestHost",
+    ]
+    for name, args in _modules(seed, options):
+        cmd.append(name)
+        for k, v in args.items():
+            if v is True:
+                cmd.append("--" + k.replace("_", "-"))
+            else:
+                cmd.append("--%s=%s" % (k, v))
+    return " ".join(cmd)
+
+
+def run_seed(job):
+    """Runs one seed.  This happens in its own (pool) process."""
+    seed, options = job
+    start = time.time()
+
+    import sim.boot as boot
+
+    boot.pre_options(
+        default_switch_type=options.router,
+        default_host_type="dv_comprehensive_test_utils.TestHost",
+        remote_interface="none",
+        interactive=False,
+        console_log=False,
+        debug_startup=False,
+        very_quiet=True,
+        virtual_time=True,
+    )
+    # Formatting every debug message adds up; the test keeps its own results.
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    for name, args in _modules(seed, options):
+        if not boot.launch_module(name, args):
+            return dict(seed=seed, passed=False, failure="Couldn't load " + name)
+    boot.post_options()
+
+    import sim.core as core
+
+    try:
+        core.world.start(threaded=False)
+    except SystemExit:
+        pass
+
+    import dv_comprehensive_test
+    from dv_comprehensive_test_utils import stats
+
+    r = dict(dv_comprehensive_test.results)
+    convergence = r.pop("convergence")
+    if convergence:
+        r["max_convergence"] = max(convergence)
+        r["mean_convergence"] = sum(convergence) / len(convergence)
+    r.update(
+        topo_seed=_modules(seed, options)[1][1]["seed"],
+        wall_time=time.time() - start,
+        packets=stats["packets"],
+        route_packets=stats["route_packets"],
+    )
+    return r
+
+
+def sweep(options):
+    seeds = range(options.first_seed, options.first_seed + options.seeds)
+    jobs = [(seed, options) for seed in seeds]
+
+    # Fork a fresh process for every seed so no simulator state leaks between
+    # them.
+    context = multiprocessing.get_context("fork")
+    pool = context.Pool(processes=options.jobs, maxtasksperchild=1)
+    results = []
+    try:
+        for i, r in enumerate(pool.imap_unordered(run_seed, jobs), 1):
+            results.append(r)
+            if not r["passed"]:
+                print("Seed %s: %s" % (r["seed"], r.get("failure")), file=sys.stderr)
+            if options.verbose or i % 100 == 0 or i == len(jobs):
+                print("%d/%d seeds done" % (i, len(jobs)), file=sys.stderr)
+            if options.stop_on_failure and not r["passed"]:
+                break
+    finally:
+        pool.terminate()
+        pool.join()
+    results.sort(key=lambda r: r["seed"])
+    return results
+
+
+def write_reports(results, options):
+    if options.json:
+        with open(options.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if options.csv:
+        with open(options.csv, "w") as f:
+            w = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            w.writeheader()
+            for r in results:
+                w.writerow(r)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--seeds", type=int, default=100, help="number of seeds")
+    parser.add_argument(
+        "--first-seed", type=int, default=1, help="first seed (default: 1)"
+    )
+    parser.add_argument("--rounds", type=int, default=10, help="rounds per seed")
+    parser.add_argument(
+        "--topo-seed",
+        type=int,
+        default=None,
+        help="seed for the topology (default: a new topology for every seed)",
+    )
+    parser.add_argument("--switches", type=int, default=5)
+    parser.add_argument("--links", type=int, default=10)
+    parser.add_argument("--router", default="dv_router", help="router module")
+    parser.add_argument(
+        "--batch-routes",
+        action="store_true",
+        help="have routers send advertisements in RouteBatchPackets",
+    )
+    parser.add_argument(
+        "--batch-delivery",
+        action="store_true",
+        help="have cables deliver packets arriving together in one batch",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=multiprocessing.cpu_count(),
+        help="number of processes (default: number of CPUs)",
+    )
+    parser.add_argument("--json", help="write per-seed results to this file")
+    parser.add_argument("--csv", help="write per-seed results to this file")
+    parser.add_argument(
+        "--stop-on-failure", action="store_true", help="stop at the first failure"
+    )
+    parser.add_argument("--verbose", "-v", action="store_true")
+    options = parser.parse_args()
+
+    start = time.time()
+    results = sweep(options)
+    write_reports(results, options)
+
+    failed = [r for r in results if not r["passed"]]
+    print(
+        "%d/%d seeds passed in %.1f seconds"
+        % (len(results) - len(failed), len(results), time.time() - start)
+    )
+    if failed:
+        first = failed[0]
+        print("First failing seed: %s (%s)" % (first["seed"], first.get("failure")))
+        print("Reproduce with:")
+        print("  " + reproduce_command(first["seed"], options))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
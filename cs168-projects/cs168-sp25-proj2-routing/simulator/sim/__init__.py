@@ -26,6 +26,20 @@ class SimConfiguration(object):
 
     debug_startup = False
 
+    # If True, the clock jumps straight to the next scheduled event instead
+    # of following the wall clock, so simulations run as fast as possible.
+    virtual_time = False
+
+    # If set, profile the event loop and write the results here as JSON
+    # when the simulation ends.  See sim.profiler.
+    profile = None
+
+    # Thinning out packet events for the GUI (see sim.comm.PacketSampler)
+    viz_sample = 1
+    viz_top_flows = None
+    viz_max_rate = None
+    viz_stats_interval = None
+
     remote_interface = "tcp"  # Probably "tcp", "udp", or None
     remote_interface_address = "127.0.0.1"
     remote_interface_port = 4444
@@ -31,7 +31,9 @@ def get_name(entity):
         print("Trying to get_name() of a", type(entity))
 
 
-def create_timer(seconds, target, recurring=True, pass_self=False, args=(), kw={}):
+def create_timer(
+    seconds, target, recurring=True, pass_self=False, args=(), kw={}, coalesce=False
+):
     """
     Create a timer
 
@@ -39,10 +41,14 @@ def create_timer(seconds, target, recurring=True, pass_self=False, args=(), kw={
     it the specified positional and keyword arguments.
     Will also pass itself as a final positional argument if pass_self
     is True.
+    If coalesce is True, a recurring timer shares its events with other
+    timers due at about the same time.  This is much cheaper when there are
+    lots of them, but each firing may be off by a fraction of a second.
     You can call .cancel() on the returned timer object to cancel it.
     """
     if recurring:
-        return core.Timer(seconds, target=target, passSelf=pass_self, args=args, kw=kw)
+        cls = core.CoalescedTimer if coalesce else core.Timer
+        return cls(seconds, target=target, passSelf=pass_self, args=args, kw=kw)
     else:
         return core.OneShot(
             seconds, target=target, passSelf=pass_self, args=args, kw=kw
@@ -201,6 +207,11 @@ def hsv_to_rgb(h, s, v, a=1):
 class Packet(object):
     DEFAULT_TTL = 20
 
+    # Packets get copied for every port they're sent out of, so they're
+    # slotted to keep them small.  Subclasses which don't declare their own
+    # __slots__ get a __dict__ as usual and can have whatever fields they like.
+    __slots__ = ("src", "dst", "ttl", "_trace", "outer_color", "inner_color")
+
     def __init__(self, dst=NullAddress, src=NullAddress):
         """
         Base class for all packets
@@ -217,7 +228,7 @@ class Packet(object):
         self.src = src
         self.dst = dst
         self.ttl = self.DEFAULT_TTL  # Decremented for each entity we go through.
-        self.trace = []  # List of entities we've been sent through.  For debugging.
+        self._trace = None  # See .trace
 
         # When using NetVis, packets are visible, and you can set the color.
         # color is a list of red, green, blue, and (optionally) alpha values.
@@ -234,7 +245,32 @@ class Packet(object):
         Meant for internal use.
         """
         if not drop:
-            self.trace.append(dstEnt)
+            self._trace = (dstEnt, self._trace)
+
+    @property
+    def trace(self):
+        """
+        List of entities we've been sent through.  For debugging.
+
+        Internally this is a chain of (entity, previous) pairs, so copies of a
+        packet share the hops they have in common instead of each having its
+        own list.  Thus, this returns a new list every time; changing it
+        doesn't change the packet (but you can assign a new list).
+        """
+        r = []
+        t = self._trace
+        while t is not None:
+            r.append(t[0])
+            t = t[1]
+        r.reverse()
+        return r
+
+    @trace.setter
+    def trace(self, entities):
+        t = None
+        for e in entities:
+            t = (e, t)
+        self._trace = t
 
     def _notify_tx(self, srcEnt, srcPort, dstEnt, dstPort, drop):
         """
@@ -292,6 +328,16 @@ class Entity(object):
         """
         pass
 
+    def handle_rx_batch(self, packets, port):
+        """
+        Called by batching cables with all the packets arriving at once.
+
+        packets is a list of Packets which all arrived on port at the same
+        time.  By default, this just calls handle_rx() for each of them.
+        """
+        for packet in packets:
+            self.handle_rx(packet, port)
+
     def handle_link_up(self, port, latency):
         """
         Called by the framework when a link attached to this Entity goes up.
@@ -61,6 +61,8 @@ class Ping(api.Packet):
     A Ping packet
     """
 
+    __slots__ = ("data",)
+
     def __init__(self, dst, data=None, color=None):
         super(Ping, self).__init__(dst=dst)
         self.data = data
@@ -91,6 +93,8 @@ class Pong(api.Packet):
     It's a returned Ping.  The original Ping is in the .original property.
     """
 
+    __slots__ = ("original",)
+
     def __init__(self, original):
         super(Pong, self).__init__(dst=original.src)
         self.original = original
@@ -108,6 +112,9 @@ class HostDiscoveryPacket(api.Packet):
     Just a way that hosts say hello
     """
 
+    # No __slots__ here: cs168.dv sets class-level colors on this, which
+    # would hide the slots from instances.
+
     def __init__(self, *args, **kw):
         # Call original constructor
         super(HostDiscoveryPacket, self).__init__(*args, **kw)
@@ -116,6 +123,8 @@ class HostDiscoveryPacket(api.Packet):
 
 
 class RoutePacket(api.Packet):
+    __slots__ = ("latency", "destination")
+
     def __init__(self, destination, latency):
         super(RoutePacket, self).__init__()
         self.latency = latency
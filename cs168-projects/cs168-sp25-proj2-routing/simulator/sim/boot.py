@@ -136,6 +136,12 @@ def pre_options(
     interactive=True,
     very_quiet=False,
     readline=True,
+    virtual_time=False,
+    profile=None,
+    viz_sample=1,
+    viz_top_flows=None,
+    viz_max_rate=None,
+    viz_stats_interval=None,
     **kw
 ):
     """
@@ -162,6 +168,20 @@ def pre_options(
     sim.config.debug_startup = debug_startup
     sim.config.interactive = interactive
     sim.config.readline = readline
+    sim.config.virtual_time = virtual_time
+    if profile is True:
+        profile = "profile.json"  # Just --profile
+    sim.config.profile = profile
+
+    sim.config.viz_sample = int(viz_sample)
+    if viz_top_flows is not None:
+        sim.config.viz_top_flows = int(viz_top_flows)
+    if viz_max_rate is not None:
+        sim.config.viz_max_rate = float(viz_max_rate)
+        if sim.config.viz_max_rate <= 0:
+            raise ValueError("--viz-max-rate must be positive")
+    if viz_stats_interval is not None:
+        sim.config.viz_stats_interval = float(viz_stats_interval)
 
     sim.config.default_host_type = default_host_type
     sim.config.default_switch_type = default_switch_type
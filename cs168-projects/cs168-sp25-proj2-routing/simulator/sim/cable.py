@@ -2,6 +2,7 @@
 Cables are how Entities are connected
 """
 
+import collections
 import random
 import sim.core as core
 
@@ -75,15 +76,25 @@ class BasicCable(DumbCable):
     Models transmission delay as well as latency and properly drops packets
     which were on the wire when a link goes down (which is pretty important
     for sensible link down behavior).
+
+    If batch is True (or DEFAULT_BATCH_DELIVERY is), all the packets which
+    arrive at the same time are handed to the receiver's handle_rx_batch()
+    at once instead of to handle_rx() one at a time.
     """
 
     DEFAULT_QUEUE_SIZE = None  # Unlimited
     DEFAULT_TX_TIME = 0.1  # Transmission delay
+    DEFAULT_BATCH_DELIVERY = False
 
     def __init__(self, *args, **kw):
         self.size = kw.pop("queue_size", self.DEFAULT_QUEUE_SIZE)
-        self.queue = []  # time, packet
+        self.batch = kw.pop("batch", self.DEFAULT_BATCH_DELIVERY)
+        # (time, packet) in delivery order.  Since every packet has to wait
+        # for the one before it to finish transmitting, new packets almost
+        # always go on the end, so a deque makes both ends cheap.
+        self.queue = collections.deque()
         self.next_delivery = None
+        self._delivery_event = None
 
         super(BasicCable, self).__init__(*args, **kw)
 
@@ -92,20 +103,18 @@ class BasicCable(DumbCable):
         self._tx_stop = None  # Time at which current transfer ends (or None)
 
     def drop(self):
-        del self.queue[-1]  # Tail drop
+        self.queue.pop()  # Tail drop
 
     def sched(self):
+        """Make sure deliver() runs when the packet at the head is due."""
         if not self.queue:
             return
-        assert [x[0] for x in self.queue] == [
-            x[0] for x in sorted(self.queue, key=self._queue_key)
-        ]
-        # self.queue.sort() # We could do better than this! (And have, apparently)
         t = self.queue[0][0]
-        self.next_delivery = None
         if self.next_delivery is None or t < self.next_delivery:
+            if self._delivery_event is not None:
+                self._delivery_event.cancel()
             self.next_delivery = t
-            core.world.doAt(t, self.deliver)
+            self._delivery_event = core.world.doAt(t, self.deliver)
 
     def deliver(self):
         if self.src:
@@ -113,6 +122,7 @@ class BasicCable(DumbCable):
         if self.dst:
             self.old_dst = self.dst
         self.next_delivery = None
+        self._delivery_event = None
         drop = False
         if not self.src or self.src.ports[self.srcPort] is not self:
             if self.queue:
@@ -120,11 +130,17 @@ class BasicCable(DumbCable):
                 drop = True
                 return
 
-        while self.queue:
-            if self.queue[0][0] > core.world.time:
-                break
-            p = self.queue.pop(0)[1]
-            self._do_deliver(p, drop)
+        queue = self.queue
+        now = core.world.time
+        if self.batch:
+            packets = []
+            while queue and queue[0][0] <= now:
+                packets.append(queue.popleft()[1])
+            if packets:
+                self._do_deliver_batch(packets, drop)
+        else:
+            while queue and queue[0][0] <= now:
+                self._do_deliver(queue.popleft()[1], drop)
         self.sched()
 
     def _do_deliver(self, p, drop):
@@ -132,6 +148,12 @@ class BasicCable(DumbCable):
         if not drop:
             self.dstEnt.handle_rx(p, self.dstPort)
 
+    def _do_deliver_batch(self, packets, drop):
+        for p in packets:
+            p._notify_rx(self.srcEnt, self.srcPort, self.dstEnt, self.dstPort, drop)
+        if not drop:
+            self.dstEnt.handle_rx_batch(packets, self.dstPort)
+
     def transfer(self, packet):
         now = core.world.time
         tx_time = self.tx_time
@@ -144,15 +166,20 @@ class BasicCable(DumbCable):
             tx_at = self._tx_stop
             self._tx_stop += tx_time
 
-        self.queue.append((tx_at + tx_time + self.latency, packet))
-        if self.size is not None and len(self.queue) > self.size:
+        queue = self.queue
+        t = tx_at + tx_time + self.latency
+        queue.append((t, packet))
+        if self.size is not None and len(queue) > self.size:
             self.drop()
-
-        if len(self.queue) >= 2:
-            if self.queue[-1][0] < self.queue[-2][0]:
-                # Deliver last before second-to-last?
-                # Simple answer: just sort
-                self.queue.sort(key=self._queue_key)
+        elif len(queue) >= 2 and t < queue[-2][0]:
+            # Deliver last before second-to-last?  This only happens if the
+            # latency went down, so it's rare; move it back to where it goes
+            # (after anything due at the same time, like a stable sort would).
+            queue.pop()
+            i = len(queue)
+            while i and queue[i - 1][0] > t:
+                i -= 1
+            queue.insert(i, (t, packet))
 
         self.sched()
 
@@ -161,11 +188,11 @@ class BasicCable(DumbCable):
         packet._notify_tx(self.srcEnt, self.srcPort, self.dstEnt, self.dstPort, False)
 
     def _handle_disconnect(self):
-        del self.queue[:]
-
-    @staticmethod
-    def _queue_key(queue_item):
-        return queue_item[0]
+        self.queue.clear()
+        if self._delivery_event is not None:
+            self._delivery_event.cancel()
+            self._delivery_event = None
+        self.next_delivery = None
 
 
 class UnreliableCable(BasicCable):
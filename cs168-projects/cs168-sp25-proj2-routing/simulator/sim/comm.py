@@ -3,6 +3,8 @@ This simulator can call methods in this class to inform external
 programs that various events have occurred.
 """
 
+import time
+
 
 class NullInterface(object):
     """Interface that does nothing / base class"""
@@ -69,4 +71,136 @@ class NullInterface(object):
         )
 
 
+class PacketSampler(object):
+    """
+    Thins out the packet events going to a remote interface
+
+    Wraps another interface and passes everything through to it, except
+    that packet() events (one for every packet on every link!) may be
+    skipped so that big simulations don't flood the GUI:
+
+      sample    Only send every sample'th packet on each link.
+      top_flows Only send packets of the top_flows busiest flows (by source
+                and destination) as of the last stats interval (or the last
+                second, if there's no stats_interval).
+      max_rate  Send at most max_rate packet events per second (which can be
+                less than one, e.g., 0.5 for one every two seconds).
+
+    If stats_interval is set, a "linkStats" message goes out that often
+    with the number of packets on each link, the busiest flows, and how
+    many packet events were skipped.  (NetVis ignores it, but other
+    clients can use it.)  All the intervals and rates are in wall-clock
+    seconds, since that's what the GUI connection cares about.
+    """
+
+    def __init__(
+        self, interface, sample=1, top_flows=None, max_rate=None, stats_interval=None
+    ):
+        if max_rate is not None and max_rate <= 0:
+            raise ValueError("max_rate must be positive")
+        self.interface = interface
+        self.sample = sample
+        self.top_flows = top_flows
+        self.max_rate = max_rate
+        self.stats_interval = stats_interval
+
+        self.skipped = 0  # Packet events not sent (in total)
+        self._link_seen = {}  # (n1, n2) -> packets ever (for sampling)
+        self._link_counts = {}  # (n1, n2) -> packets this interval
+        self._flow_counts = {}  # (src, dst) -> packets this interval
+        self._top = None  # Set of flows to send, if limited
+        self._skipped = 0  # Packet events not sent this interval
+        # Token bucket which holds up to a second's worth, but always at
+        # least one, or rates below one per second would never send anything
+        self._bucket = None if max_rate is None else max(1.0, max_rate)
+        self._tokens = self._bucket
+        self._last = time.time()  # For the token bucket
+        self._interval_start = self._last
+
+    def __getattr__(self, name):
+        return getattr(self.interface, name)
+
+    def packet(self, n1, n2, packet, duration, drop=False):
+        now = time.time()
+        if now - self._interval_start >= (self.stats_interval or 1):
+            self._end_interval(now)
+
+        link = (n1, n2)
+        self._link_counts[link] = self._link_counts.get(link, 0) + 1
+        flow = None
+        if self.top_flows is not None or self.stats_interval:
+            flow = (_name(packet.src), _name(packet.dst))
+            self._flow_counts[flow] = self._flow_counts.get(flow, 0) + 1
+
+        if self.sample > 1:
+            seen = self._link_seen.get(link, 0)
+            self._link_seen[link] = seen + 1
+            if seen % self.sample:
+                self._skip()
+                return
+        if self._top is not None and flow not in self._top:
+            self._skip()
+            return
+        if self.max_rate is not None:
+            self._tokens = min(
+                self._bucket, self._tokens + (now - self._last) * self.max_rate
+            )
+            self._last = now
+            if self._tokens < 1:
+                self._skip()
+                return
+            self._tokens -= 1
+
+        self.interface.packet(n1, n2, packet, duration, drop=drop)
+
+    def _skip(self):
+        self.skipped += 1
+        self._skipped += 1
+
+    def _end_interval(self, now):
+        flows = sorted(self._flow_counts.items(), key=lambda x: -x[1])
+        if self.top_flows is not None:
+            self._top = set(f for f, _ in flows[: self.top_flows])
+        if self.stats_interval and hasattr(self.interface, "send"):
+            self.interface.send(
+                {
+                    "type": "linkStats",
+                    "interval": now - self._interval_start,
+                    "links": [[a, b, n] for (a, b), n in self._link_counts.items()],
+                    "flows": [[a, b, n] for (a, b), n in flows[: self.top_flows or 10]],
+                    "skipped": self._skipped,
+                },
+                droppable=True,
+            )
+        self._link_counts = {}
+        self._flow_counts = {}
+        self._skipped = 0
+        self._interval_start = now
+
+
+def _name(entity):
+    return getattr(entity, "name", None)
+
+
+def wrap(interface):
+    """Wraps interface in a PacketSampler if sim.config asks for one."""
+    import sim
+
+    c = sim.config
+    if (
+        c.viz_sample > 1
+        or c.viz_top_flows is not None
+        or c.viz_max_rate is not None
+        or c.viz_stats_interval is not None
+    ):
+        return PacketSampler(
+            interface,
+            sample=c.viz_sample,
+            top_flows=c.viz_top_flows,
+            max_rate=c.viz_max_rate,
+            stats_interval=c.viz_stats_interval,
+        )
+    return interface
+
+
 interface = NullInterface
@@ -0,0 +1,156 @@
+"""
+Non-blocking output for the remote interfaces (comm_tcp and comm_web)
+
+The simulation thread never writes to a socket.  Each connection has an
+Outbox which the simulator drops messages into, and a coroutine on a
+shared asyncio event loop (running in its own thread) which empties it.
+Messages which pile up while waiting are written out together, at most
+once per FRAME_INTERVAL.
+
+Visualization events (e.g., packets flying by) are marked droppable.
+They go in a ring buffer, so if a client can't keep up, the oldest ones
+get thrown away instead of stalling anything.  Other messages (topology
+changes and such) are never dropped, but a client which falls so far
+behind that even those pile up past MAX_BACKLOG gets disconnected.
+"""
+
+import asyncio
+import collections
+import heapq
+import itertools
+import logging
+import threading
+
+log = logging.getLogger("comm")
+
+FRAME_INTERVAL = 1 / 30.0  # Seconds between writes to a connection
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    """Returns the event loop for remote interfaces, starting it if needed."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            t = threading.Thread(target=loop.run_forever, name="comm")
+            t.daemon = True
+            t.start()
+            _loop = loop
+    return _loop
+
+
+def run(coro):
+    """Runs a coroutine on the event loop and waits for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
+
+
+def spawn(coro):
+    """Starts a coroutine on the event loop without waiting for it."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+class Outbox(object):
+    """
+    Messages waiting to be sent on one connection
+
+    put() is safe to call from any thread.  Messages go in already encoded
+    as bytes, so nothing the simulator changes afterwards (a packet's
+    colors, say) can leak into a message still waiting to go out, and a
+    message for several connections only needs encoding once.  They are
+    taken out in the order they were put in, less any droppable ones which
+    got pushed out of the ring buffer.
+    """
+
+    DEFAULT_SIZE = 1000  # Droppable messages kept while waiting
+    MAX_BACKLOG = 10000  # Undroppable ones before we give up on a client
+
+    def __init__(self, size=None):
+        if size is None:
+            size = self.DEFAULT_SIZE
+        self._seq = itertools.count()
+        self._keep = collections.deque()  # (seq, data)
+        self._ring = collections.deque(maxlen=size)  # (seq, data)
+        self._loop = get_loop()
+        self._ready = asyncio.Event()
+        self._signaled = False
+        self.dropped = 0  # Total droppable messages thrown away
+        self.closed = False
+
+    def __len__(self):
+        return len(self._keep) + len(self._ring)
+
+    def put(self, data, droppable=False):
+        if self.closed:
+            return
+        if droppable:
+            ring = self._ring
+            if len(ring) == ring.maxlen:
+                self.dropped += 1
+            ring.append((next(self._seq), data))
+        else:
+            self._keep.append((next(self._seq), data))
+            if len(self._keep) > self.MAX_BACKLOG:
+                log.warning("Remote interface client too slow; disconnecting")
+                self.close()
+                return
+        self._signal()
+
+    def close(self):
+        self.closed = True
+        self._signaled = False
+        self._signal()
+
+    def _signal(self):
+        # One wakeup per batch is plenty
+        if not self._signaled:
+            self._signaled = True
+            self._loop.call_soon_threadsafe(self._ready.set)
+
+    def take(self):
+        """Removes and returns all the waiting (encoded) messages, oldest first."""
+        self._signaled = False
+        keep = []
+        ring = []
+        # popleft() is atomic, so this is safe while other threads put()
+        while self._keep:
+            keep.append(self._keep.popleft())
+        while self._ring:
+            try:
+                ring.append(self._ring.popleft())
+            except IndexError:
+                break
+        if not ring:
+            return [m for _, m in keep]
+        if not keep:
+            return [m for _, m in ring]
+        return [m for _, m in heapq.merge(keep, ring, key=lambda x: x[0])]
+
+    async def send_loop(self, write):
+        """
+        Feeds the messages to a connection until the Outbox is closed
+
+        The coroutine write(data) sends the bytes (and only returns once it
+        has).
+        """
+        reported = 0
+        try:
+            while not self.closed:
+                await self._ready.wait()
+                self._ready.clear()
+                msgs = self.take()
+                if msgs:
+                    await write(b"".join(msgs))
+                if self.dropped != reported:
+                    log.debug(
+                        "Dropped %s visualization events for a slow client",
+                        self.dropped - reported,
+                    )
+                    reported = self.dropped
+                await asyncio.sleep(FRAME_INTERVAL)
+        except Exception:
+            log.debug("Remote interface connection died", exc_info=True)
+        finally:
+            self.close()
@@ -5,23 +5,20 @@ log viewer and NetVis.
 
 import sim
 import sim.comm as comm
-import socket
+import sim.comm_async as comm_async
+import asyncio
 import json
-import threading
 import traceback
 
 import sim.core as core
 
 
 class StreamingConnection(comm.NullInterface):
-    READ_TIMEOUT = 5
-
-    def __init__(self, parent, sock):
-        self.sock = sock
+    def __init__(self, parent, reader, writer):
         self.parent = parent
-        self.thread = threading.Thread(target=self._recvLoop)
-        self.thread.daemon = True
-        self.thread.start()
+        self.reader = reader
+        self.writer = writer
+        self.outbox = comm_async.Outbox()
         self._send_initialize()
 
     def _send_initialize(self):
@@ -65,40 +62,34 @@ class StreamingConnection(comm.NullInterface):
             msg = {"type": "info", "text": core.world.info}
             parent.send(msg, connections=self)
 
-    def _recvLoop(self):
-        import select
-
-        d = bytes()
-        retry = 0
-        while True:
-            try:
-                (rx, tx, xx) = select.select(
-                    [self.sock], [], [self.sock], self.READ_TIMEOUT
-                )
-            except Exception:
-                # sock died
-                break
-            if len(xx):
-                # TODO: reopen?
-                break
-            if len(rx):
-                try:
-                    r = self.sock.recv(4096)
-                    if len(r) == 0:
-                        retry += 1
-                        if retry > 4:
-                            break
-                        continue
-                    else:
-                        retry = 0
-                    d = d + r
-                except Exception:
-                    # TODO: reopen
+    async def _run(self):
+        """Reads messages until the connection goes away.  Runs on the comm loop."""
+        sender = asyncio.ensure_future(self.outbox.send_loop(self._write))
+        # If sending stops (the client died or fell too far behind), so does
+        # reading.
+        sender.add_done_callback(lambda _: self.writer.close())
+        try:
+            while True:
+                l = await self.reader.readline()
+                if not l:
                     break
-                while d.find("\n".encode()) >= 0:
-                    l, d = d.split("\n".encode(), 1)
-                    self._process_incoming(l)
-        core.events._disconnect(self)
+                self._process_incoming(l)
+        except Exception:
+            # TODO: reopen?
+            pass
+        finally:
+            sender.cancel()
+            core.events._disconnect(self)
+
+    @staticmethod
+    def _encode(msg):
+        if not isinstance(msg, str):
+            msg = json.dumps(msg, default=repr) + "\n"
+        return msg.encode()
+
+    async def _write(self, data):
+        self.writer.write(data)
+        await self.writer.drain()
 
     def _process_incoming(self, l):
         """
@@ -151,20 +142,16 @@ class StreamingConnection(comm.NullInterface):
         if node:
             node.disconnect()
 
+    def send(self, msg, droppable=False):
+        """Queues a message (a JSON-able dict or a raw string) to be sent."""
+        self.outbox.put(self._encode(msg), droppable)
+
     def send_raw(self, msg):
-        try:
-            self.sock.send(msg.encode())
-        except Exception:
-            try:
-                self.sock.close()
-            except Exception:
-                pass
-            self.sock = None
-            # TODO: reopen?
-            pass
+        self.send(msg)
 
     def _close(self):
-        self.sock.close()
+        self.outbox.close()
+        self.writer.close()
 
 
 class StreamingInterface(object):
@@ -173,31 +160,19 @@ class StreamingInterface(object):
     def __init__(self):
         self.connections = []
 
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.sock.bind(
-            (sim.config.remote_interface_address, sim.config.remote_interface_port)
+        self.server = comm_async.run(
+            asyncio.start_server(
+                self._accept,
+                sim.config.remote_interface_address,
+                sim.config.remote_interface_port,
+                reuse_address=True,
+            )
         )
-        self.sock.listen(5)
-        self.thread = threading.Thread(target=self._listenLoop)
-        self.thread.daemon = True
-        self.thread.start()
-
-    def _listenLoop(self):
-        import select
 
-        try:
-            while True:
-                (rx, tx, xx) = select.select([self.sock], [], [self.sock])
-                if len(xx):
-                    break
-                sock, addr = self.sock.accept()
-                # print "connect",addr
-                self.connections.append(self.CONNECTION_CLASS(self, sock))
-        except Exception:
-            traceback.print_exc()
-            pass
-        core.simlog.debug("No longer listening for remote interfaces")
+    async def _accept(self, reader, writer):
+        con = self.CONNECTION_CLASS(self, reader, writer)
+        self.connections.append(con)
+        await con._run()
 
     def _disconnect(self, con):
         try:
@@ -210,20 +185,23 @@ class StreamingInterface(object):
         except Exception:
             pass
 
-    def send(self, msg, connections=None):
+    def send(self, msg, connections=None, droppable=False):
+        """
+        Sends a message to some or all of the connections
+
+        This never blocks.  If droppable, the message may be thrown away if
+        a connection isn't keeping up.
+        """
         if connections is None:
-            connections = self.connections
+            connections = list(self.connections)
         elif not isinstance(connections, list):
             connections = [connections]
-        r = json.dumps(msg, default=repr) + "\n"
-        bad = []
+        if not connections:
+            return
+        # Encoded once, here, for all of them
+        data = self.CONNECTION_CLASS._encode(msg)
         for c in connections:
-            try:
-                c.send_raw(r)
-            except Exception:
-                bad.append(c)
-        for c in bad:
-            self._disconnect(c)
+            c.outbox.put(data, droppable)
 
     def send_console(self, text):
         # self.send({'type':'console','msg':text})
@@ -279,7 +257,7 @@ class StreamingInterface(object):
         }
         # if color is not None:
         #  m['stroke'] = color
-        self.send(m)
+        self.send(m, droppable=True)
 
     def send_link_down(self, srcid, sport, dstid, dport):
         self.send(
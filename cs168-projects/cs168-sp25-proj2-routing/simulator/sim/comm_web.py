@@ -8,6 +8,7 @@ needs a major rewrite/refactor.
 
 import sim
 import sim.comm as comm
+import sim.comm_async as comm_async
 import socket
 import errno
 import json
@@ -66,6 +67,8 @@ except Exception:
 class WebHandler(SimpleHTTPRequestHandler, StreamingConnection):
     _websocket_open = False  # Should be protected by a lock, but isn't
 
+    READ_TIMEOUT = 5
+
     WS_CONTINUE = 0
     WS_TEXT = 1
     WS_BINARY = 2
@@ -161,6 +164,7 @@ class WebHandler(SimpleHTTPRequestHandler, StreamingConnection):
 
     def _close(self):
         self._websocket_open = False
+        self.outbox.close()
         try:
             pass  # self.wfile.close()
         except Exception:
@@ -186,6 +190,9 @@ class WebHandler(SimpleHTTPRequestHandler, StreamingConnection):
         self.send_header("Connection", "Upgrade")
         self.end_headers()
 
+        # Everything we send goes through the outbox (see comm_async), so
+        # that a slow browser can't hold up the simulation.
+        self.outbox = comm_async.Outbox()
         self.parent.connections.append(self)
 
         self._send_initialize()
@@ -262,8 +269,7 @@ class WebHandler(SimpleHTTPRequestHandler, StreamingConnection):
                     if op in (self.WS_TEXT, self.WS_BINARY):
                         self._ws_message(op, d)
                     elif op == self.WS_PING:
-                        msg = self._frame(self.WS_PONG, d)
-                        self._send_real(msg)
+                        self.outbox.put(self._frame(self.WS_PONG, d))
                     elif op == self.WS_CLOSE:
                         if self._websocket_open:
                             self._websocket_open = False
@@ -285,9 +291,20 @@ class WebHandler(SimpleHTTPRequestHandler, StreamingConnection):
         self.connection.settimeout(0)
         while True:
             try:
-                deframer.send(self.rfile.read(1))
+                data = self.rfile.read(1)
             except Exception:
                 break
+            if not data:
+                break  # Python 3 returns None instead of raising
+            try:
+                deframer.send(data)
+            except Exception:
+                break
+
+        # The socket is non-blocking now, so the event loop can write to it.
+        # If that stops working, stop reading too.
+        sender = comm_async.spawn(self.outbox.send_loop(self._write))
+        sender.add_done_callback(lambda _: setattr(self, "_websocket_open", False))
 
         import select
 
@@ -395,25 +412,16 @@ class WebHandler(SimpleHTTPRequestHandler, StreamingConnection):
 
         return hdr + msg
 
-    def send_raw(self, msg):
-        try:
-            msg = self._frame(self.WS_TEXT, msg.encode())
-            self._send_real(msg)
-        except Exception as e:
-            raise
+    @classmethod
+    def _encode(cls, msg):
+        if isinstance(msg, bytes):
+            return msg  # Already framed
+        if not isinstance(msg, str):
+            msg = json.dumps(msg, default=repr) + "\n"
+        return cls._frame(cls.WS_TEXT, msg.encode())
 
-    def _send_real(self, msg):
-        try:
-            self.wfile.write(msg)
-            self.wfile.flush()
-        except Exception:
-            try:
-                self.server._disconnect()
-            except Exception:
-                pass
-            self._websocket_open = False
-            # TODO: reopen?
-            pass
+    async def _write(self, data):
+        await comm_async.get_loop().sock_sendall(self.connection, data)
 
 
 ThreadingMixIn.daemon_threads = True
@@ -463,20 +471,23 @@ class WebInterface(ThreadingMixIn, HTTPServer):
         except Exception:
             pass
 
-    def send(self, msg, connections=None):
+    def send(self, msg, connections=None, droppable=False):
+        """
+        Sends a message to some or all of the connections
+
+        This never blocks.  If droppable, the message may be thrown away if
+        a connection isn't keeping up.
+        """
         if connections is None:
-            connections = self.connections
+            connections = list(self.connections)
         elif not isinstance(connections, list):
             connections = [connections]
-        r = json.dumps(msg, default=repr) + "\n"
-        bad = []
+        if not connections:
+            return
+        # Encoded (and framed) once, here, for all of them
+        data = WebHandler._encode(msg)
         for c in connections:
-            try:
-                c.send_raw(r)
-            except Exception:
-                bad.append(c)
-        for c in bad:
-            self._disconnect(c)
+            c.outbox.put(data, droppable)
 
     def send_console(self, text):
         # self.send({'type':'console','msg':text})
@@ -532,7 +543,7 @@ class WebInterface(ThreadingMixIn, HTTPServer):
         }
         # if color is not None:
         #  m['stroke'] = color
-        self.send(m)
+        self.send(m, droppable=True)
 
     def send_link_down(self, srcid, sport, dstid, dport):
         self.send(
@@ -10,18 +10,16 @@ from __future__ import print_function
 import sys
 import sim
 import copy
+import operator
 import threading
-
-try:
-    import queue as Queue
-except ImportError:
-    import Queue
 import time
 import weakref
 
 import logging
 import traceback
 
+from sim.scheduler import Scheduler, Event
+
 
 class EventLogger(logging.Handler):
     _attributes = [
@@ -128,16 +126,20 @@ class Timer(object):
 
     def __init__(self, seconds, target=None, args=(), kw={}, passSelf=False):
         self.seconds = seconds
-        world.doLater(seconds, self.timeout)
         self.func = target
         self.stopped = False
         self.args = list(args)
         self.kw = dict(kw)
         if passSelf:
             self.args = [self] + self.args
+        self._event = self._schedule()
+
+    def _schedule(self):
+        return world.doLater(self.seconds, self.timeout)
 
     def cancel(self):
         self.stopped = True
+        self._event.cancel()
 
     def timer(self):
         if self.func:
@@ -149,7 +151,7 @@ class Timer(object):
         try:
             rv = self.timer()
             if rv is not False:
-                world.doLater(self.seconds, self.timeout)
+                self._event = self._schedule()
         except Exception:
             simlog.exception("Exception while executing a timer")
             # traceback.print_exc()
@@ -169,6 +171,84 @@ class OneShot(Timer):
             # traceback.print_exc()
 
 
+class CoalescedTimer(Timer):
+    """It's a timer which shares its events with other timers.
+    It may fire up to half a wheel slot early or late.
+    You should just create this with api.create_timer(coalesce=True)."""
+
+    def _schedule(self):
+        return world.wheel.doLater(self.seconds, self.timeout)
+
+
+class TimerWheel(object):
+    """
+    Batches up timers that are due at about the same time
+
+    Deadlines are rounded to the nearest multiple of resolution, and all of
+    the timers that land in the same slot share a single World event.  This
+    keeps thousands of periodic timers (e.g., one per router) from each
+    putting their own entries into the scheduler.  Far-off slots are just
+    events in the scheduler's heap, so we don't need multiple wheel levels.
+    """
+
+    DEFAULT_RESOLUTION = 0.5
+
+    def __init__(self, resolution=None):
+        self.resolution = resolution or self.DEFAULT_RESOLUTION
+        self._slots = {}  # slot number -> [Event]
+
+        # Slots for timers set before the world starts.  Like the World's
+        # prelist, these are numbered relative to when the world starts.
+        self._early_slots = {}
+
+    def doLater(self, seconds, method, *args, **kw):
+        """
+        Call method(*args, **kw) in approximately seconds
+
+        Returns an Event, which can be cancelled.
+        """
+        event = Event(None, method, args, kw)
+        owner = world.scheduler.owner
+        if owner is not None and threading.current_thread() is not owner:
+            # Only the simulation thread touches the slots
+            world.do(self._add, event, seconds)
+        else:
+            self._add(event, seconds)
+        return event
+
+    def _add(self, event, seconds):
+        if world._thread is None:
+            now = 0
+            slots = self._early_slots
+        else:
+            now = world.time
+            slots = self._slots
+
+        n = int(round((now + seconds) / self.resolution))
+        if n * self.resolution <= now:
+            n = int(now // self.resolution) + 1
+        event.time = n * self.resolution
+
+        slot = slots.get(n)
+        if slot is None:
+            slots[n] = slot = []
+            if slots is self._early_slots:
+                world.doLater(event.time, self._fire, slots, n)
+            else:
+                world.doAt(event.time, self._fire, slots, n)
+        slot.append(event)
+
+    def _fire(self, slots, n):
+        profiler = world.profiler
+        for event in slots.pop(n):
+            if not event.cancelled:
+                if profiler is not None:
+                    # Count each timer on its own, not just the slot
+                    profiler.call(event.method, event.args, event.kw, via=_catch)
+                else:
+                    _catch(event.method, *event.args, **event.kw)
+
+
 world = None
 events = None
 
@@ -180,9 +260,9 @@ class World(object):
         global world
         world = self
 
-        self.queue = Queue.PriorityQueue()
+        self.scheduler = Scheduler()
+        self.wheel = TimerWheel()
         self._thread = None
-        self._count = 0
         self.ended = False
 
         # When the world isn't running, items are put in the prelist.
@@ -203,9 +283,12 @@ class World(object):
         self.max_timeout = 10
 
         self.trace = False
+        self.profiler = None  # See start_profiling()
         self._running = True
 
-        self.virtual_time = False
+        self.virtual_time = sim.config.virtual_time
+        if sim.config.profile:
+            self.start_profiling()
 
         import sim.api as api
 
@@ -241,7 +324,9 @@ class World(object):
             import sim.comm as interface
 
             should_sleep = False
-        events = interface.interface()
+        import sim.comm as comm
+
+        events = comm.wrap(interface.interface())
         if should_sleep:
             # Sleep a sec to allow remote to possibly connect
             time.sleep(1)
@@ -259,11 +344,37 @@ class World(object):
 
     def stop(self):
         self._running = False
+        self.scheduler.wake()
+
+    def start_profiling(self):
+        """
+        Start timing every callback the World runs
+
+        Returns the sim.profiler.Profiler collecting the statistics; see
+        its stats(), summary(), and dump() methods.  If profiling is already
+        on, returns the existing one.
+        """
+        if self.profiler is None:
+            from sim.profiler import Profiler
+
+            self.profiler = Profiler(self)
+        return self.profiler
+
+    def stop_profiling(self):
+        """Stop profiling and return the Profiler (or None if there wasn't one)."""
+        profiler = self.profiler
+        self.profiler = None
+        if profiler is not None:
+            profiler.stop()
+        return profiler
 
     def _get_time_real(self):
         # if self._start_time is None:
         return time.time()
 
+    def _get_time_virtual(self):
+        return self._time
+
     @property
     def time(self):
         return self._get_time()
@@ -283,14 +394,6 @@ class World(object):
         if f:
             f(update, selected, unselected, a, b)
 
-    def _real_doLater(_self, _seconds, _method, *_args, **_kw):
-        t = _self.time + _seconds
-        _self._real_doAt(t, _method, *_args, **_kw)
-
-    def _real_doAt(_self, _t, _method, *_args, **_kw):
-        _self.queue.put((_t, _self._count, _method, _args, _kw))
-        _self._count += 1
-
     @property
     def info(self):
         return self._info
@@ -308,32 +411,53 @@ class World(object):
         assert self._thread is None
         simlog.info("Starting simulation.")
 
-        for a, b, c, d in self._prelist:
-            self._real_doLater(a, b, *c, **d)
-        self._prelist = []
-
         if threaded:
             self._thread = threading.Thread(target=self.run)
             self._thread.daemon = True
-            self._thread.start()
         else:
             self._thread = threading.current_thread()
+        self.scheduler.owner = self._thread
+
+        # Prelist entries hold delays relative to the start of the world
+        now = self.time
+        for event in self._prelist:
+            event.time += now
+            self.scheduler.schedule(event)
+        self._prelist = []
+
+        if threaded:
+            self._thread.start()
+        else:
             self.run()
 
     def do(self, _method, *args, **kw):
-        self.doLater(0, _method, *args, **kw)
+        return self.doLater(0, _method, *args, **kw)
 
     def doLater(_self, _seconds, _method, *_args, **_kw):
+        """
+        Call _method(*_args, **_kw) after _seconds
+
+        Returns an Event, which can be cancelled.
+        """
         if _self._thread is not None:
-            _self._real_doLater(_seconds, _method, *_args, **_kw)
-        else:
-            _self._prelist.append((_seconds, _method, _args, _kw))
+            return _self.scheduler.schedule(
+                Event(_self.time + _seconds, _method, _args, _kw)
+            )
+        event = Event(_seconds, _method, _args, _kw)
+        _self._prelist.append(event)
+        return event
 
     def doAt(_self, _time, _method, *_args, **_kw):
+        """
+        Call _method(*_args, **_kw) at time _time
+
+        Returns an Event, which can be cancelled.
+        """
         if _self._thread is not None:
-            _self._real_doAt(_time, _method, *_args, **_kw)
-        else:
-            _self._prelist.append((_time - _self.time, _method, _args, _kw))
+            return _self.scheduler.schedule(Event(_time, _method, _args, _kw))
+        event = Event(_time - _self.time, _method, _args, _kw)
+        _self._prelist.append(event)
+        return event
 
     def sleep(self, seconds):
         """
@@ -351,55 +475,57 @@ class World(object):
         event.wait()
 
     def _run_real(self):
-        timeout = None
-        waiting = Queue.PriorityQueue()
+        self._run(self._tick_real)
+
+    def _run_virtual(self):
+        self._run(self._tick_virtual)
+
+    def _tick_real(self):
+        """Runs everything that's due, then sleeps until something else is."""
+        scheduler = self.scheduler
+        t = self.time
+        while self._running:
+            event = scheduler.pop_due(t)
+            if event is None:
+                break
+            self._dispatch(event)
+
+        next_time = scheduler.peek_time()
+        if next_time is None:
+            scheduler.wait(5)
+        else:
+            timeout = next_time - self.time
+            if timeout > 0:
+                scheduler.wait(timeout)
+
+    def _tick_virtual(self):
+        """
+        Jumps the clock straight to the next event and runs everything due then
+
+        Nobody ever waits for time to pass, so simulations run as fast as the
+        handlers do.  We only block if there's nothing scheduled at all (in
+        which case it's up to another thread to give us something to do).
+        """
+        scheduler = self.scheduler
+        next_time = scheduler.peek_time()
+        if next_time is None:
+            scheduler.wait(5)
+            return
+        if next_time > self._time:
+            self._time = next_time
+
+        t = self._time
+        while self._running:
+            event = scheduler.pop_due(t)
+            if event is None:
+                break
+            self._dispatch(event)
 
+    def _run(self, tick):
         try:
             while self._running:
-                try:
-                    t = self.time
-                    while not waiting.empty():
-                        o = waiting.get()
-                        if o[0] <= t:
-                            self.queue.put(o)
-                            timeout = None
-                        else:
-                            waiting.put(o)
-                            o = waiting.get()
-                            waiting.put(o)
-                            timeout = o[0] - t
-                            break
-                    # print("World waiting for",timeout)
-
-                    o = self.queue.get(True, 5 if timeout is None else timeout)
-                except Exception:
-                    # print("empty")
-                    continue
-
-                t = self.time
-                if o[0] > t:
-                    # Hasn't expired yet...
-                    # print("recycle")
-                    waiting.put(o)
-                    o = waiting.get()
-                    waiting.put(o)
-                    timeout = o[0] - t
-                    continue
-                # Expired
-                timeout = None
-                if self.trace:
-                    if hasattr(o[2], "__self__"):
-                        print(
-                            o[2].__self__.__class__.__name__
-                            + "."
-                            + o[2].__func__.__name__,
-                            end="",
-                        )
-                    else:
-                        print(o[2], end="")
-                    print(o[3], o[4] if len(o[4]) else "")
-                o[2](*o[3], **o[4])
-                self._post_hook()
+                self.scheduler.drain()
+                tick()
         except KeyboardInterrupt:
             pass
         except SystemExit:
@@ -410,6 +536,22 @@ class World(object):
         finally:
             simlog.debug("Simulation ended")
             self.ended = True
+            if sim.config.profile and self.profiler is not None:
+                self.stop_profiling().dump(sim.config.profile)
+
+    def _dispatch(self, event):
+        if self.trace:
+            m = event.method
+            if hasattr(m, "__self__"):
+                print(m.__self__.__class__.__name__ + "." + m.__func__.__name__, end="")
+            else:
+                print(m, end="")
+            print(event.args, event.kw if len(event.kw) else "")
+        if self.profiler is not None:
+            self.profiler.dispatch(event)
+        else:
+            event.method(*event.args, **event.kw)
+        self._post_hook()
 
     def _post_hook(self):
         pass
@@ -593,16 +735,69 @@ class TopoNode(object):
                     remote.transfer(p)
 
 
+_packet_fields = {}  # Packet type -> (names of its slots, getter for them)
+
+
+def _get_packet_fields(cls):
+    fields = _packet_fields.get(cls)
+    if fields is None:
+        names = []
+        for c in cls.__mro__:
+            slots = c.__dict__.get("__slots__", ())
+            if isinstance(slots, str):
+                slots = (slots,)
+            for name in slots:
+                if name in ("__dict__", "__weakref__"):
+                    continue
+                if name.startswith("__") and not name.endswith("__"):
+                    name = "_%s%s" % (c.__name__.lstrip("_"), name)
+                names.append(name)
+        # attrgetter with two or more names returns a tuple; make sure it does.
+        getter = operator.attrgetter(*(names + names[:1] * (len(names) < 2)))
+        fields = _packet_fields[cls] = (names, getter)
+    return fields
+
+
 def _duplicate_packet(p):
-    n = type(p).__new__(type(p))
-    for k, v in vars(p).items():
-        if isinstance(v, (dict, tuple, list, set)):
-            setattr(n, k, copy.copy(v))
-        else:
+    """
+    Copies a packet
+
+    The containers in it get copied (shallowly), everything else is shared.
+    """
+    cls = type(p)
+    n = cls.__new__(cls)
+    names, getter = _get_packet_fields(cls)
+    if names:
+        try:
+            values = getter(p)
+        except AttributeError:
+            # Some slot was never set.  Do it the slow way.
+            values = [getattr(p, k, _unset) for k in names]
+        for k, v in zip(names, values):
+            # Most fields are lists (colors), tuples (the trace), or not
+            # containers at all, so check for those quickly.
+            t = type(v)
+            if t is list:
+                v = v[:]
+            elif t is dict or t is set:
+                v = v.copy()
+            elif t is not tuple and isinstance(v, (dict, tuple, list, set)):
+                v = copy.copy(v)
+            elif v is _unset:
+                continue
+            setattr(n, k, v)
+    d = getattr(p, "__dict__", None)
+    if d:
+        for k, v in d.items():
+            if isinstance(v, (dict, tuple, list, set)):
+                v = copy.copy(v)
             setattr(n, k, v)
     return n
 
 
+_unset = object()
+
+
 _builtin = sys.modules.get("__builtin__", sys.modules.get("builtins")).__dict__
 
 
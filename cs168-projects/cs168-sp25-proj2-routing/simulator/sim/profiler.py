@@ -0,0 +1,225 @@
+"""
+Profiling for the simulator's event loop
+
+Turn it on with world.start_profiling() (or the --profile=FILE commandline
+option, which also writes the results to FILE as JSON when the simulation
+ends).  While it's on, every callback the World runs is timed, so you can
+see which kinds of events, and which entities and cables, the time is
+going to.
+
+Like core, students should not need to look in here.
+"""
+
+from __future__ import print_function
+import json
+import random
+import time
+import types
+
+# CPU time used by the calling thread.  Wall clock time would also charge a
+# handler for any time the simulation thread spent preempted by the comm or
+# GUI threads.
+_cpu_time = getattr(time, "thread_time", time.process_time)
+
+import sim.api as api
+import sim.cable as cable
+import sim.core as core
+
+
+class _CallbackStats(object):
+    """
+    Counts and handler times for one kind of callback
+
+    total, max and samples are CPU seconds; wall is the wall clock total.
+    """
+
+    __slots__ = ("count", "total", "wall", "max", "samples")
+
+    MAX_SAMPLES = 10000  # Times kept for percentiles (a uniform sample)
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.wall = 0.0
+        self.max = 0.0
+        self.samples = []
+
+    def add(self, elapsed, wall, rand):
+        self.count += 1
+        self.total += elapsed
+        self.wall += wall
+        if elapsed > self.max:
+            self.max = elapsed
+        if len(self.samples) < self.MAX_SAMPLES:
+            self.samples.append(elapsed)
+        else:
+            # Reservoir sampling keeps every call equally likely to be kept
+            i = rand.randrange(self.count)
+            if i < self.MAX_SAMPLES:
+                self.samples[i] = elapsed
+
+    def as_dict(self):
+        samples = sorted(self.samples)
+        return dict(
+            count=self.count,
+            total=self.total,
+            wall=self.wall,
+            mean=self.total / self.count,
+            p50=_percentile(samples, 50),
+            p99=_percentile(samples, 99),
+            max=self.max,
+        )
+
+
+def _percentile(samples, p):
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100.0))]
+
+
+class Profiler(object):
+    """
+    Collects statistics about the callbacks run by a World
+
+    You generally get one of these from world.start_profiling().  Times are
+    CPU seconds the simulation thread spent in each handler (time.thread_time),
+    so time the thread spent blocked or preempted by the comm and GUI threads
+    isn't charged to whatever happened to be running.  Each callback kind also
+    has its wall clock total, as "wall".
+
+    Timers are counted as whatever they call.  Time is also charged to an
+    "owner": the Entity whose method was called, or "src->dst" for a cable.
+    Callbacks which belong to nobody in particular (e.g., a timer wheel slot
+    firing lots of timers) are only counted by kind.
+    """
+
+    DEPTH_INTERVAL = 1.0  # Simulated seconds between queue depth samples
+
+    def __init__(self, world):
+        self.world = world
+        self.callbacks = {}  # Callback name -> _CallbackStats
+        self.owners = {}  # Owner name -> seconds
+        self.queue_depth = []  # [simulated time, pending events]
+        self.events = 0  # Events dispatched by the World
+        self._names = {}  # (function, bound type) -> callback name
+        self._next_depth = None
+        self._rand = random.Random(0)  # Don't disturb the simulation's RNG
+        self._wall_start = time.time()
+        self._sim_start = world.time
+        self._wall_stop = None
+        self._sim_stop = None
+
+    def stop(self):
+        self._wall_stop = time.time()
+        self._sim_stop = self.world.time
+
+    def dispatch(self, event):
+        """Runs an Event from the World's scheduler, keeping statistics."""
+        self.events += 1
+        now = self.world.time
+        if self._next_depth is None or now >= self._next_depth:
+            self.queue_depth.append([now, len(self.world.scheduler)])
+            self._next_depth = now + self.DEPTH_INTERVAL
+        self.call(event.method, event.args, event.kw)
+
+    def call(self, method, args, kw, via=None):
+        """
+        Calls method(*args, **kw), keeping statistics.
+
+        If via is given, calls via(method, *args, **kw) instead, but still
+        counts it as method.
+        """
+        start = _cpu_time()
+        wall_start = time.perf_counter()
+        try:
+            if via is not None:
+                return via(method, *args, **kw)
+            return method(*args, **kw)
+        finally:
+            wall = time.perf_counter() - wall_start
+            elapsed = _cpu_time() - start
+            func, obj = _resolve(method)
+            key = (func, type(obj))
+            name = self._names.get(key)
+            if name is None:
+                name = self._names[key] = _callback_name(func, obj)
+            stats = self.callbacks.get(name)
+            if stats is None:
+                stats = self.callbacks[name] = _CallbackStats()
+            stats.add(elapsed, wall, self._rand)
+            owner = _owner(obj)
+            if owner is not None:
+                self.owners[owner] = self.owners.get(owner, 0.0) + elapsed
+
+    def stats(self):
+        """
+        Returns everything collected so far as a dict
+
+        callbacks and owners are sorted with the most expensive first.
+        """
+        wall_stop = self._wall_stop if self._wall_stop is not None else time.time()
+        sim_stop = self._sim_stop if self._sim_stop is not None else self.world.time
+        wall_time = wall_stop - self._wall_start
+        callbacks = sorted(self.callbacks.items(), key=lambda x: -x[1].total)
+        owners = sorted(self.owners.items(), key=lambda x: -x[1])
+        return dict(
+            wall_time=wall_time,
+            sim_time=sim_stop - self._sim_start,
+            events=self.events,
+            events_per_sec=self.events / wall_time if wall_time > 0 else None,
+            callbacks=dict((k, v.as_dict()) for k, v in callbacks),
+            owners=dict(owners),
+            queue_depth=self.queue_depth,
+        )
+
+    def dump(self, filename):
+        """Writes stats() to a file as JSON."""
+        with open(filename, "w") as f:
+            json.dump(self.stats(), f, indent=2)
+
+    def summary(self, top=10):
+        """Returns a short human-readable report as a string."""
+        s = self.stats()
+        lines = [
+            "%s events in %.2f seconds (%.0f/sec), %.2f simulated seconds"
+            % (s["events"], s["wall_time"], s["events_per_sec"] or 0, s["sim_time"])
+        ]
+        lines.append(
+            "%-40s %9s %9s %9s %9s %9s"
+            % ("Callback", "Count", "CPU", "p50", "p99", "Wall")
+        )
+        for name, c in list(s["callbacks"].items())[:top]:
+            lines.append(
+                "%-40s %9s %9.3f %9.6f %9.6f %9.3f"
+                % (name[:40], c["count"], c["total"], c["p50"], c["p99"], c["wall"])
+            )
+        lines.append("%-40s %9s" % ("Owner", "CPU"))
+        for name, t in list(s["owners"].items())[:top]:
+            lines.append("%-40s %9.3f" % (name[:40], t))
+        return "\n".join(lines)
+
+
+def _resolve(method):
+    """Returns (function, object it's bound to) for a callback."""
+    obj = getattr(method, "__self__", None)
+    if isinstance(obj, core.Timer) and obj.func is not None:
+        # Charge timers to whatever they call
+        method = obj.func
+        obj = getattr(method, "__self__", None)
+    if isinstance(obj, types.ModuleType):
+        obj = None  # A builtin function, like sys.exit
+    return getattr(method, "__func__", method), obj
+
+
+def _callback_name(func, obj):
+    if obj is not None:
+        return type(obj).__name__ + "." + getattr(func, "__name__", "?")
+    return getattr(func, "__qualname__", None) or str(func)
+
+
+def _owner(obj):
+    if isinstance(obj, api.Entity):
+        return obj.name
+    if isinstance(obj, cable.Cable):
+        return "%s->%s" % (obj.srcEnt.name, obj.dstEnt.name)
+    return None
@@ -0,0 +1,115 @@
+"""
+The event scheduler that drives the simulator's World.
+
+Like core, students should not need to look in here.
+
+All the real work happens on a single thread (the one running the World),
+so the pending events live in a plain heap with no locking at all.  Other
+threads (the console, the GUI interfaces, sleep()) don't touch the heap;
+they drop events into an inbox which the simulation thread drains once per
+tick.  deque.append() and deque.popleft() are atomic, so the inbox doesn't
+need a lock either.
+"""
+
+import collections
+import heapq
+import itertools
+import threading
+
+
+class Event(object):
+    """
+    A handle for something scheduled to happen later
+
+    These are returned by World.doLater() and friends.  You can call
+    .cancel() on one to keep it from ever running.
+    """
+
+    __slots__ = ("time", "method", "args", "kw", "cancelled")
+
+    def __init__(self, time, method, args, kw):
+        self.time = time
+        self.method = method
+        self.args = args
+        self.kw = kw
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def __repr__(self):
+        return "<Event %s at %s%s>" % (
+            getattr(self.method, "__name__", self.method),
+            self.time,
+            " (cancelled)" if self.cancelled else "",
+        )
+
+
+class Scheduler(object):
+    """
+    A heap of Events ordered by time (ties are broken by insertion order)
+
+    Only the owner thread may touch the heap.  Everyone else goes through
+    the inbox, which gets merged in by drain().
+    """
+
+    def __init__(self):
+        self._heap = []  # (time, seq, Event)
+        self._seq = itertools.count()
+        self._inbox = collections.deque()
+        self._wakeup = threading.Event()
+        self.owner = None  # The thread allowed to touch the heap
+
+    def __len__(self):
+        return len(self._heap) + len(self._inbox)
+
+    def schedule(self, event):
+        """Add an Event.  Safe to call from any thread."""
+        if threading.current_thread() is self.owner:
+            heapq.heappush(self._heap, (event.time, next(self._seq), event))
+        else:
+            # Take the sequence number now so that events from one thread
+            # which land at the same time still run in the order they were
+            # scheduled.
+            self._inbox.append((event.time, next(self._seq), event))
+            self._wakeup.set()
+        return event
+
+    def drain(self):
+        """Move everything from the inbox into the heap."""
+        inbox = self._inbox
+        heap = self._heap
+        while inbox:
+            heapq.heappush(heap, inbox.popleft())
+
+    def peek_time(self):
+        """Returns the time of the next live Event, or None if there isn't one."""
+        heap = self._heap
+        while heap:
+            if not heap[0][2].cancelled:
+                return heap[0][0]
+            heapq.heappop(heap)
+        return None
+
+    def pop_due(self, now):
+        """Returns the next live Event due at or before now, or None."""
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            event = heapq.heappop(heap)[2]
+            if not event.cancelled:
+                return event
+        return None
+
+    def wake(self):
+        """Make a pending wait() return early."""
+        self._wakeup.set()
+
+    def wait(self, timeout):
+        """
+        Block until timeout passes or another thread schedules something
+
+        timeout of None means to wait until something is scheduled.
+        """
+        self._wakeup.wait(timeout)
+        self._wakeup.clear()
+        self.drain()
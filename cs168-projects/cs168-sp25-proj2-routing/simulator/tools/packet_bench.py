@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Microbenchmark for packet and routing table entry overhead
+
+Reports how many bytes a packet (and a copy of one) takes, how many
+copies per second the simulator can make (it makes one for every port a
+packet is sent out of), and the same sort of numbers for TableEntry.
+
+Run it from the simulator directory:
+  python tools/packet_bench.py
+"""
+
+from __future__ import print_function
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+
+import sim
+
+sim.config.console_log = False
+
+import sim.core as core
+import sim.api as api
+from sim.basics import Ping
+from cs168.dv import RoutePacket, TableEntry
+
+
+N = 100000
+HOPS = 5
+
+
+def _bytes_each(make, n=N):
+    """Average bytes allocated (and still live) per call of make()."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objs = [make() for _ in range(n)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objs
+    return (after - before) / float(n)
+
+
+def _per_second(f, n=N):
+    start = time.perf_counter()
+    for _ in range(n):
+        f()
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    hosts = []
+    for i in range(HOPS + 1):
+        h = api.HostEntity()
+        h.name = "h%s" % (i,)
+        hosts.append(h)
+
+    ping = Ping(hosts[-1], data=1)
+    route = RoutePacket(hosts[-1], 10)
+    for p in (ping, route):
+        for h in hosts[:HOPS]:
+            p._notify_rx(None, 0, h, 0, False)
+
+    print("Packets (with a %s hop trace):" % (HOPS,))
+    for name, p in (("Ping", ping), ("RoutePacket", route)):
+        make = lambda: type(p)(hosts[-1], 1)
+        copy = lambda: core._duplicate_packet(p)
+        print("  %-12s %6.0f bytes/packet  %6.0f bytes/copy  %9.0f copies/sec"
+              % (name, _bytes_each(make), _bytes_each(copy), _per_second(copy)))
+
+    print("Table entries:")
+    make = lambda: TableEntry(dst=hosts[0], port=1, latency=5, expire_time=100.0)
+    print("  %-12s %6.0f bytes/entry  %23.0f entries/sec"
+          % ("TableEntry", _bytes_each(make), _per_second(make)))
+
+
+if __name__ == "__main__":
+    main()
@@ -280,6 +280,101 @@ def reconstituteGrid(bitRep):
     width, height = bitRep[:2]
     return Grid(width, height, bitRepresentation= bitRep[2:])
 
+class FoodGrid:
+    """
+    An immutable Grid of booleans packed into the bits of one int, for use in
+    search states.  Cell (x,y) is bit x * height + y, so hashing and comparing
+    take time proportional to the number of words in the int rather than the
+    number of cells, eating a dot is one XOR that makes a new FoodGrid (the
+    old one is left alone, so there is nothing to copy), and counting the
+    dots is a popcount (bin().count, since int.bit_count needs Python 3.10).
+
+    It reads like a Grid: foodGrid[x][y], count(), asList(), width and height
+    all work, but there is no assignment; use eat() instead.
+    """
+    __slots__ = ('width', 'height', 'bits', '_hash')
+
+    def __init__(self, width, height, bits=0):
+        self.width = width
+        self.height = height
+        self.bits = bits
+        self._hash = hash(bits)
+
+    @staticmethod
+    def fromGrid(grid):
+        height = grid.height
+        bits = 0
+        for x in range(grid.width):
+            column = grid[x]
+            for y in range(height):
+                if column[y]:
+                    bits |= 1 << (x * height + y)
+        return FoodGrid(grid.width, height, bits)
+
+    def toGrid(self):
+        g = Grid(self.width, self.height)
+        for x, y in self.asList():
+            g[x][y] = True
+        return g
+
+    def _bit(self, x, y):
+        # Like Grid, negative indices count back from the end, and indices
+        # off the grid raise IndexError rather than reading another cell.
+        if x < 0: x += self.width
+        if y < 0: y += self.height
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError('FoodGrid index out of range: %s' % ((x, y),))
+        return x * self.height + y
+
+    def hasFood(self, x, y):
+        return (self.bits >> self._bit(x, y)) & 1 == 1
+
+    def eat(self, x, y):
+        "Returns this grid without the food at (x,y), or itself if there is none"
+        mask = 1 << self._bit(x, y)
+        if self.bits & mask:
+            return FoodGrid(self.width, self.height, self.bits ^ mask)
+        return self
+
+    def __getitem__(self, x):
+        if x < 0: x += self.width
+        if not 0 <= x < self.width:
+            raise IndexError('FoodGrid index out of range: %s' % (x,))
+        column = self.bits >> (x * self.height)
+        return tuple([(column >> y) & 1 == 1 for y in range(self.height)])
+
+    def __str__(self):
+        out = [[str(self.hasFood(x, y))[0] for x in range(self.width)] for y in range(self.height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+    def __eq__(self, other):
+        if not isinstance(other, FoodGrid): return False
+        return (self.bits == other.bits and self.width == other.width
+                and self.height == other.height)
+
+    def __hash__(self):
+        return self._hash
+
+    def copy(self):
+        return self
+
+    def count(self, item = True):
+        n = bin(self.bits).count('1')
+        return n if item else self.width * self.height - n
+
+    def asList(self, key = True):
+        if not key:
+            return [(x, y) for x in range(self.width) for y in range(self.height)
+                    if not self.hasFood(x, y)]
+        list = []
+        bits, height = self.bits, self.height
+        while bits:
+            low = bits & -bits
+            list.append(divmod(low.bit_length() - 1, height))
+            bits ^= low
+        return list
+
 ####################################
 # Parts you shouldn't have to read #
 ####################################
@@ -17,6 +17,7 @@ In search.py, you will implement generic search algorithms which are called by
 Pacman agents (in searchAgents.py).
 """
 
+import array
 import util
 from game import Directions
 from typing import List
@@ -75,6 +76,74 @@ def tinyMazeSearch(problem: SearchProblem) -> List[Directions]:
     w = Directions.WEST
     return  [s, s, w, s, w, w, s, w]
 
+class SearchTree:
+    """
+    The nodes a search has expanded, as parent pointers.
+
+    Node i was reached from node parents[i] (-1 for the start) by
+    actions[i].  The fringe holds (state, parent node, action, ...)
+    records instead of whole paths, so generating a successor takes the
+    same time and memory however deep it is, and only expanded nodes are
+    kept.  The path is built once, by following parents back to the start,
+    when a goal is found.
+    """
+
+    def __init__(self):
+        self.parents = array.array('l')
+        self.actions = []
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def add(self, parent: int, action) -> int:
+        """Records an expanded node, returning its number."""
+        self.parents.append(parent)
+        self.actions.append(action)
+        return len(self.actions) - 1
+
+    def path(self, parent: int, action) -> List[Directions]:
+        """
+        Returns the actions from the start to the successor reached from
+        node parent by action (or [] for the start itself, parent -1).
+        """
+        if parent == -1:
+            return []
+        actions = [action]
+        parents = self.parents
+        node = parent
+        while parents[node] != -1:
+            actions.append(self.actions[node])
+            node = parents[node]
+        actions.reverse()
+        return actions
+
+
+def _graphSearch(problem: SearchProblem, fringe) -> List[Directions]:
+    """
+    The search shared by DFS and BFS, which only differ in their fringe
+    (a Stack or a Queue).
+    """
+    tree = SearchTree()
+    visited = set()
+
+    fringe.push((problem.getStartState(), -1, None))
+
+    while not fringe.isEmpty():
+        current_state, parent, action = fringe.pop()
+
+        if problem.isGoalState(current_state):
+            return tree.path(parent, action)
+
+        if current_state not in visited:
+            visited.add(current_state)
+            node = tree.add(parent, action)
+
+            for successor, next_action, _ in problem.getSuccessors(current_state):
+                if successor not in visited:
+                    fringe.push((successor, node, next_action))
+
+    return []
+
 def depthFirstSearch(problem: SearchProblem) -> List[Directions]:
     """
     Search the deepest nodes in the search tree first.
@@ -89,80 +158,53 @@ def depthFirstSearch(problem: SearchProblem) -> List[Directions]:
     print("Is the start a goal?", problem.isGoalState(problem.getStartState()))
     print("Start's successors:", problem.getSuccessors(problem.getStartState()))
     """
-    from util import Stack
-    
-    stack = Stack()
-    visited = set()
-    start_state = problem.getStartState()
-    
-    stack.push((start_state, []))
-    
-    while not stack.isEmpty():
-        current_state, path = stack.pop()
-
-        if problem.isGoalState(current_state): 
-            return path
-        
-        if current_state not in visited: 
-            visited.add(current_state)
-        
-            for successor, action, _ in problem.getSuccessors(current_state):
-                if successor not in visited: 
-                    stack.push((successor, path + [action]))
-        
-    return []
+    return _graphSearch(problem, util.Stack())
 
 def breadthFirstSearch(problem: SearchProblem) -> List[Directions]:
     """Search the shallowest nodes in the search tree first."""
-    from util import Queue
-    
-    queue = Queue()
-    visited = set()
+    return _graphSearch(problem, util.Queue())
+
+def _bestFirstSearch(problem: SearchProblem, heuristic) -> List[Directions]:
+    """
+    The search shared by UCS and A*: expands the state with the lowest
+    cost plus heuristic first.
+
+    The fringe is a util.IndexedPriorityQueue holding each state once, so
+    finding a cheaper path to a state already on it lowers its priority
+    instead of adding a duplicate entry.  reached maps every state reached
+    so far to (lowest known cost, parent node, action), and a state is only
+    (re)queued when that cost improves, so an expanded state is only
+    expanded again if the heuristic is inconsistent.
+    """
+    fringe = util.IndexedPriorityQueue()
+    tree = SearchTree()
     start_state = problem.getStartState()
-    
-    queue.push((start_state, []))
-    
-    while not queue.isEmpty():
-        current_state, path = queue.pop()
-        
+
+    reached = {start_state: (0, -1, None)}
+    fringe.push(start_state, heuristic(start_state, problem))
+
+    while not fringe.isEmpty():
+        current_state = fringe.pop()
+        cost, parent, action = reached[current_state]
+
         if problem.isGoalState(current_state):
-            return path
-        
-        if current_state not in visited: 
-            visited.add(current_state)
-        
-            for successor, action, _ in problem.getSuccessors(current_state):
-                if successor not in visited: 
-                    queue.push((successor, path + [action]))
-        
-    return []
+            return tree.path(parent, action)
 
-def uniformCostSearch(problem: SearchProblem) -> List[Directions]:
-    """Search the node of least total cost first."""
-    from util import PriorityQueue
-    
-    pq = PriorityQueue()
-    visited = set()
-    start_state = problem.getStartState()
-    
-    pq.push((start_state, [], 0), 0)
-    
-    while not pq.isEmpty():
-        current_state, path, cost= pq.pop()
-        
-        if problem.isGoalState(current_state): 
-            return path
-        
-        if current_state not in visited: 
-            visited.add(current_state)
+        node = tree.add(parent, action)
 
-            for successor, action, step_cost in problem.getSuccessors(current_state): 
-                if successor not in visited: 
-                    new_cost = cost + step_cost
-                    pq.push((successor, path + [action], new_cost), new_cost)
+        for successor, next_action, step_cost in problem.getSuccessors(current_state):
+            new_cost = cost + step_cost
+            previous = reached.get(successor)
+            if previous is None or new_cost < previous[0]:
+                reached[successor] = (new_cost, node, next_action)
+                fringe.update(successor, new_cost + heuristic(successor, problem))
 
     return []
 
+def uniformCostSearch(problem: SearchProblem) -> List[Directions]:
+    """Search the node of least total cost first."""
+    return _bestFirstSearch(problem, nullHeuristic)
+
 
 def nullHeuristic(state, problem=None) -> float:
     """
@@ -173,34 +215,7 @@ def nullHeuristic(state, problem=None) -> float:
 
 def aStarSearch(problem: SearchProblem, heuristic=nullHeuristic) -> List[Directions]:
     """Search the node that has the lowest combined cost and heuristic first."""
-    from util import PriorityQueue
-    
-    pq = PriorityQueue()
-    visited = set()
-    start_state = problem.getStartState()
-    
-    pq.push((start_state, [], 0), 0 + heuristic(start_state, problem))
-    cost_map = {start_state: 0}
-    
-    while not pq.isEmpty():
-        current_state, path, cost = pq.pop()  # Dequeue the lowest-cost node
-        
-        if problem.isGoalState(current_state):
-            return path
-        
-        if current_state not in visited or cost <= cost_map.get(current_state, float('inf')):
-            visited.add(current_state)
-            cost_map[current_state] = cost
-            
-            for successor, action, step_cost in problem.getSuccessors(current_state):
-                new_cost = cost + step_cost
-                priority = new_cost + heuristic(successor, problem)
-                
-                if successor not in visited or new_cost < cost_map.get(successor, float('inf')):
-                    cost_map[successor] = new_cost
-                    pq.push((successor, path + [action], new_cost), priority)
-    
-    return []
+    return _bestFirstSearch(problem, heuristic)
 
 # Abbreviations
 bfs = breadthFirstSearch
@@ -34,14 +34,17 @@ description for details.
 Good luck and happy searching!
 """
 
-from typing import List, Tuple, Any
+from typing import Tuple, Any
 from game import Directions
 from game import Agent
 from game import Actions
+from game import FoodGrid
 import util
 import time
+import heapq
 import search
 import pacman
+import mazeDistances
 
 class GoWestAgent(Agent):
     "An agent that goes West until it can't."
@@ -417,35 +420,48 @@ class FoodSearchProblem:
 
     A search state in this problem is a tuple ( pacmanPosition, foodGrid ) where
       pacmanPosition: a tuple (x,y) of integers specifying Pacman's position
-      foodGrid:       a Grid (see game.py) of either True or False, specifying remaining food
+      foodGrid:       a FoodGrid (see game.py) of either True or False, specifying
+                      remaining food.  It reads like a Grid, but is immutable and
+                      cheap to hash, which matters when there are lots of states.
     """
     def __init__(self, startingGameState: pacman.GameState):
-        self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
+        self.start = (startingGameState.getPacmanPosition(),
+                      FoodGrid.fromGrid(startingGameState.getFood()))
         self.walls = startingGameState.getWalls()
         self.startingGameState = startingGameState
         self._expanded = 0 # DO NOT CHANGE
         self.heuristicInfo = {} # A dictionary for the heuristic to store information
+        self._moves = {}
 
     def getStartState(self):
         return self.start
 
     def isGoalState(self, state):
-        return state[1].count() == 0
+        return state[1].bits == 0
 
     def getSuccessors(self, state):
         "Returns successor states, the actions they require, and a cost of 1."
         successors = []
         self._expanded += 1 # DO NOT CHANGE
-        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state[0]
-            dx, dy = Actions.directionToVector(direction)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
-                successors.append( ( ((nextx, nexty), nextFood), direction, 1) )
+        position, food = state
+        for direction, nextPosition in self._getMoves(position):
+            successors.append( ( (nextPosition, food.eat(*nextPosition)), direction, 1) )
         return successors
 
+    def _getMoves(self, position):
+        # The legal moves from each position never change, so they are worked out once.
+        moves = self._moves.get(position)
+        if moves is None:
+            moves = []
+            x,y = position
+            for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                dx, dy = Actions.directionToVector(direction)
+                nextx, nexty = int(x + dx), int(y + dy)
+                if not self.walls[nextx][nexty]:
+                    moves.append((direction, (nextx, nexty)))
+            self._moves[position] = moves
+        return moves
+
     def getCostOfActions(self, actions):
         """Returns the cost of a particular sequence of actions.  If those actions
         include an illegal move, return 999999"""
@@ -466,7 +482,12 @@ class AStarFoodSearchAgent(SearchAgent):
         self.searchFunction = lambda prob: search.aStarSearch(prob, foodHeuristic)
         self.searchType = FoodSearchProblem
 
-def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
+# The most tree weights foodHeuristic remembers.  Each costs around 300
+# bytes on bigSearch (the FoodGrid key, its bits and the dict slot), so the
+# memo stays at a few megabytes however long the search runs.
+MST_CACHE_SIZE = 20000
+
+def foodHeuristic(state: Tuple[Tuple, FoodGrid], problem: FoodSearchProblem):
     """
     Your heuristic for the FoodSearchProblem goes here.
 
@@ -474,7 +495,7 @@ def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
     your search may have a but our your heuristic is not admissible!  On the
     other hand, inadmissible heuristics may find optimal solutions, so be careful.
 
-    The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a Grid
+    The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a FoodGrid
     (see game.py) of either True or False. You can call foodGrid.asList() to get
     a list of food coordinates instead.
 
@@ -490,34 +511,58 @@ def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
     problem.heuristicInfo['wallCount']
     """
     position, foodGrid = state
-    
-    from util import manhattanDistance
-    from itertools import combinations
-
-    foodList = foodGrid.asList()  # Convert food grid to a list of food positions
-
-    if not foodList:
+    if foodGrid.bits == 0:
         return 0
 
-    points = [position] + foodList
-    distances = {}
-    for p1, p2 in combinations(points, 2):
-        distances[(p1, p2)] = manhattanDistance(p1, p2)
-        distances[(p2, p1)] = distances[(p1, p2)]
-
-    mst_cost = 0
-    visited = {points[0]}
-    edges = sorted((distances[(points[0], p)], p) for p in points[1:])
-
-    while edges:
-        cost, next_point = edges.pop(0)
-        if next_point not in visited:
-            mst_cost += cost
-            visited.add(next_point)
-            edges.extend((distances[(next_point, p)], p) for p in points if p not in visited)
-            edges.sort()
-
-    return mst_cost
+    # Pacman has to walk to some dot first, and then on to all the others,
+    # which takes at least as long as a minimum spanning tree of the dots
+    # (by maze distance).  Lots of states have the same food left, so the
+    # tree's weight is remembered for each set of dots.
+    info = problem.heuristicInfo
+    if 'mazeDistances' not in info:
+        info['mazeDistances'] = mazeDistances.getMazeDistances(problem.walls)
+        info['mstWeights'] = {}
+    distances = info['mazeDistances']
+    foodList = foodGrid.asList()
+
+    closest = min([distances.getDistance(position, food) for food in foodList])
+    mstWeights = info['mstWeights']
+    mstWeight = mstWeights.get(foodGrid)
+    if mstWeight is None:
+        if len(mstWeights) >= MST_CACHE_SIZE:
+            # Forget the oldest; the search has usually moved on from it.
+            del mstWeights[next(iter(mstWeights))]
+        mstWeight = mstWeights[foodGrid] = mstWeightOf(foodList, distances)
+    return closest + mstWeight
+
+def mstWeightOf(points, distances):
+    """
+    Returns the weight of a minimum spanning tree connecting the points, with
+    edges weighted by maze distance (a mazeDistances.MazeDistances).  Uses
+    Prim's algorithm with a heap.
+    """
+    table = distances.table
+    size = len(distances)
+    cells = [distances.index[point] for point in points]
+    inTree = [False] * len(points)
+    best = [float('inf')] * len(points)
+    best[0] = 0
+    heap = [(0, 0)]
+    weight = 0
+    while heap:
+        cost, i = heapq.heappop(heap)
+        if inTree[i]:
+            continue
+        inTree[i] = True
+        weight += cost
+        row = cells[i] * size
+        for j, cell in enumerate(cells):
+            if not inTree[j]:
+                d = table[row + cell]
+                if d < best[j]:
+                    best[j] = d
+                    heapq.heappush(heap, (d, j))
+    return weight
 
 class ClosestDotSearchAgent(SearchAgent):
     "Search for all food using a sequence of searches"
@@ -593,11 +638,13 @@ def mazeDistance(point1: Tuple[int, int], point2: Tuple[int, int], gameState: pa
     Example usage: mazeDistance( (2,4), (5,6), gameState)
 
     This might be a useful helper function for your ApproximateSearchAgent.
+
+    The distances for the whole maze are worked out once (see mazeDistances.py),
+    so after the first call this is just a table lookup.
     """
     x1, y1 = point1
     x2, y2 = point2
     walls = gameState.getWalls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-    prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    return mazeDistances.getMazeDistances(walls).getDistance(point1, point2)
@@ -0,0 +1,95 @@
+# searchBenchmark.py
+# ------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Times the search algorithms in search.py on some of the bigger layouts.
+
+  python searchBenchmark.py [-r REPEATS] [-c CASE ...]
+
+For each case, prints the path cost, the number of nodes expanded, the
+expansions per second, and the peak memory the search allocated (measured
+with tracemalloc, which slows everything down, so it gets a separate run).
+"""
+
+import optparse
+import time
+import tracemalloc
+
+import layout
+import pacman
+import search
+import searchAgents
+
+# name: (layout, problem class, search function, heuristic or None)
+CASES = {
+    'bigMaze-dfs': ('bigMaze', searchAgents.PositionSearchProblem, search.dfs, None),
+    'bigMaze-bfs': ('bigMaze', searchAgents.PositionSearchProblem, search.bfs, None),
+    'bigMaze-ucs': ('bigMaze', searchAgents.PositionSearchProblem, search.ucs, None),
+    'bigMaze-astar': ('bigMaze', searchAgents.PositionSearchProblem, search.astar,
+                      searchAgents.manhattanHeuristic),
+    'mediumCorners-bfs': ('mediumCorners', searchAgents.CornersProblem, search.bfs, None),
+    'mediumCorners-astar': ('mediumCorners', searchAgents.CornersProblem, search.astar,
+                            searchAgents.cornersHeuristic),
+    'trickySearch-ucs': ('trickySearch', searchAgents.FoodSearchProblem, search.ucs, None),
+    'trickySearch-astar': ('trickySearch', searchAgents.FoodSearchProblem, search.astar,
+                           searchAgents.foodHeuristic),
+}
+
+
+def makeProblem(layoutName, problemClass):
+    state = pacman.GameState()
+    state.initialize(layout.getLayout(layoutName), 0)
+    if problemClass is searchAgents.PositionSearchProblem:
+        return problemClass(state, warn=False, visualize=False)
+    return problemClass(state)
+
+
+def runCase(case):
+    """Returns (problem, actions) after running one case."""
+    layoutName, problemClass, function, heuristic = CASES[case]
+    problem = makeProblem(layoutName, problemClass)
+    if heuristic is None:
+        return problem, function(problem)
+    return problem, function(problem, heuristic=heuristic)
+
+
+def benchmark(case, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        problem, actions = runCase(case)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    tracemalloc.start()
+    runCase(case)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return problem.getCostOfActions(actions), problem._expanded, best, peak
+
+
+if __name__ == '__main__':
+    optParser = optparse.OptionParser()
+    optParser.add_option('-r', '--repeats', type='int', dest='repeats', default=3,
+                         help='Runs to take the fastest of (default %default)')
+    optParser.add_option('-c', '--case', action='append', dest='cases',
+                         help='Case to run (default all of: %s)' % ', '.join(CASES))
+    opts, args = optParser.parse_args()
+
+    print('%-22s %6s %9s %9s %12s %10s' % ('case', 'cost', 'expanded', 'seconds',
+                                           'expanded/s', 'peak KiB'))
+    for case in opts.cases or CASES:
+        cost, expanded, elapsed, peak = benchmark(case, opts.repeats)
+        print('%-22s %6d %9d %9.3f %12.0f %10.0f' % (case, cost, expanded, elapsed,
+                                                    expanded / elapsed, peak / 1024.0))
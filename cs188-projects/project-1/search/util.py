@@ -221,6 +221,110 @@ class PriorityQueueWithFunction(PriorityQueue):
         "Adds an item to the queue with priority from the priority function"
         PriorityQueue.push(self, item, self.priorityFunction(item))
 
+class IndexedPriorityQueue:
+    """
+      A priority queue holding each item at most once, whose priority can
+      be lowered in place.  It keeps a binary heap of [priority, count,
+      item, position] entries plus a dict from each item to its entry, so
+      push, pop and update all take O(log n) time (PriorityQueue.update
+      scans the whole heap), and each hashes the item only once.  As in
+      PriorityQueue, the lowest-priority item comes out first, and ties go
+      to the item pushed (or last lowered) first.
+
+      Items must be hashable.
+    """
+    def  __init__(self):
+        self.heap = []
+        self.entries = {}
+        self.count = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, item):
+        return item in self.entries
+
+    def isEmpty(self):
+        return len(self.heap) == 0
+
+    def getPriority(self, item):
+        return self.entries[item][0]
+
+    def push(self, item, priority):
+        if item in self.entries:
+            raise ValueError('%r is already in the queue' % (item,))
+        self._push(item, priority)
+
+    def _push(self, item, priority):
+        entry = [priority, self.count, item, len(self.heap)]
+        self.entries[item] = entry
+        self.heap.append(entry)
+        self.count += 1
+        self._siftUp(entry)
+
+    def pop(self):
+        heap = self.heap
+        item = heap[0][2]
+        del self.entries[item]
+        last = heap.pop()
+        if heap:
+            last[3] = 0
+            heap[0] = last
+            self._siftDown(last)
+        return item
+
+    def update(self, item, priority):
+        # Same rules as PriorityQueue.update: lower the priority of an item
+        # already in the queue, leave it alone if the new priority is no
+        # lower, and push it if it isn't there.
+        entry = self.entries.get(item)
+        if entry is None:
+            self._push(item, priority)
+        elif priority < entry[0]:
+            entry[0] = priority
+            entry[1] = self.count
+            self.count += 1
+            self._siftUp(entry)
+
+    # Entries are compared on (priority, count), and counts are unique, so
+    # items are never compared.
+
+    def _siftUp(self, entry):
+        heap = self.heap
+        key = (entry[0], entry[1])
+        pos = entry[3]
+        while pos > 0:
+            parentPos = (pos - 1) >> 1
+            parent = heap[parentPos]
+            if not key < (parent[0], parent[1]):
+                break
+            heap[pos] = parent
+            parent[3] = pos
+            pos = parentPos
+        heap[pos] = entry
+        entry[3] = pos
+
+    def _siftDown(self, entry):
+        heap = self.heap
+        size = len(heap)
+        key = (entry[0], entry[1])
+        pos = entry[3]
+        child = 2 * pos + 1
+        while child < size:
+            childEntry = heap[child]
+            if child + 1 < size:
+                right = heap[child + 1]
+                if (right[0], right[1]) < (childEntry[0], childEntry[1]):
+                    child += 1
+                    childEntry = right
+            if not (childEntry[0], childEntry[1]) < key:
+                break
+            heap[pos] = childEntry
+            childEntry[3] = pos
+            pos = child
+            child = 2 * pos + 1
+        heap[pos] = entry
+        entry[3] = pos
 
 def manhattanDistance( xy1, xy2 ):
     "Returns the Manhattan distance between points xy1 and xy2"
@@ -18,6 +18,7 @@ import random, util
 
 from game import Agent
 from pacman import GameState
+from mazeDistances import getMazeDistances
 
 class ReflexAgent(Agent):
     """
@@ -365,6 +366,7 @@ def betterEvaluationFunction(currentGameState: GameState):
     foodGrid = currentGameState.getFood()
     ghostStates = currentGameState.getGhostStates()
     capsules = currentGameState.getCapsules()
+    distances = getMazeDistances(currentGameState.getWalls())
 
     # Initialize score with the base game score
     score = currentGameState.getScore()
@@ -382,10 +384,10 @@ def betterEvaluationFunction(currentGameState: GameState):
             elif distanceToGhost < 4:
                 score -= 300  # Medium penalty for being nearby
 
-    # --- 2. Move toward the nearest food ---
+    # --- 2. Move toward the nearest food (by maze distance, so walls count) ---
     foodList = foodGrid.asList()
-    if foodList:
-        minFoodDistance = min(manhattanDistance(pacmanPos, food) for food in foodList)
+    minFoodDistance = distances.closestDistance(pacmanPos, foodGrid)
+    if minFoodDistance is not None:
         score += 10 / (minFoodDistance + 1)  # Prioritize closer food
 
     # --- 3. Reward eating food ---
@@ -393,7 +395,7 @@ def betterEvaluationFunction(currentGameState: GameState):
 
     # --- 4. Encourage eating power pellets (capsules) ---
     for capsule in capsules:
-        distanceToCapsule = manhattanDistance(pacmanPos, capsule)
+        distanceToCapsule = distances.getDistance(pacmanPos, capsule)
         score += 20 / (distanceToCapsule + 1)  # Encourages getting capsules
 
     return score
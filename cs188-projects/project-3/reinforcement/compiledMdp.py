@@ -0,0 +1,215 @@
+# compiledMdp.py
+# --------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+A flattened copy of an MDP, for running Bellman backups in bulk.
+
+CompiledMDP asks an mdp.MarkovDecisionProcess for all of its states,
+actions, transitions and rewards once, and numbers them:
+
+  states[i]              the i-th state
+  rowStart[i]            (state, action) rows for state i are
+                         rowStart[i] .. rowStart[i+1]-1
+  rowAction[r]           the action of row r
+  entryStart[r]          transitions of row r are entryStart[r] .. entryStart[r+1]-1
+  entryNext, entryProb,  the next state index, probability and reward of
+  entryReward            each transition
+
+After that, a sweep of value iteration never calls back into the MDP.  If
+NumPy is installed, the tables are arrays and a sweep is a handful of vector
+operations; otherwise the same tables are plain lists and are swept in
+Python.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class CompiledMDP:
+
+    def __init__(self, mdp, useNumpy=True):
+        self.mdp = mdp
+        self.states = list(mdp.getStates())
+        self.index = {state: i for i, state in enumerate(self.states)}
+        self.useNumpy = useNumpy and np is not None
+
+        rowStart, rowAction, entryStart = [0], [], [0]
+        entryNext, entryProb, entryReward = [], [], []
+        index = self.index
+        for state in self.states:
+            # Terminal states have no future rewards, so they get no rows
+            if not mdp.isTerminal(state):
+                for action in mdp.getPossibleActions(state):
+                    for nextState, prob in mdp.getTransitionStatesAndProbs(state, action):
+                        entryNext.append(index[nextState])
+                        entryProb.append(prob)
+                        entryReward.append(mdp.getReward(state, action, nextState))
+                    rowAction.append(action)
+                    entryStart.append(len(entryNext))
+            rowStart.append(len(rowAction))
+
+        self.rowStart = rowStart
+        self.rowAction = rowAction
+        self.entryStart = entryStart
+        self.entryNext = entryNext
+        self.entryProb = entryProb
+        self.entryReward = entryReward
+
+        if self.useNumpy:
+            counts = np.diff(np.array(entryStart, dtype=np.intp))
+            self._entryRow = np.repeat(np.arange(len(rowAction), dtype=np.intp), counts)
+            self._entryNext = np.array(entryNext, dtype=np.intp)
+            self._entryProb = np.array(entryProb, dtype=float)
+            self._entryReward = np.array(entryReward, dtype=float)
+            rowCounts = np.diff(np.array(rowStart, dtype=np.intp))
+            self._hasRows = rowCounts > 0
+            self._firstRows = np.array(rowStart[:-1], dtype=np.intp)[self._hasRows]
+            self._rowState = np.repeat(np.arange(len(self.states), dtype=np.intp), rowCounts)
+
+    def __len__(self):
+        return len(self.states)
+
+    def zeros(self):
+        """Returns a value table with every state's value set to zero."""
+        if self.useNumpy:
+            return np.zeros(len(self.states))
+        return [0.0] * len(self.states)
+
+    def qValues(self, values, discount):
+        """
+        Returns the Q-value of every (state, action) row, given a value
+        table indexed like self.states.
+        """
+        if self.useNumpy:
+            contrib = self._entryProb * (self._entryReward + discount * values[self._entryNext])
+            return np.bincount(self._entryRow, weights=contrib, minlength=len(self.rowAction))
+
+        entryNext, entryProb, entryReward = self.entryNext, self.entryProb, self.entryReward
+        entryStart = self.entryStart
+        q = [0.0] * len(self.rowAction)
+        for r in range(len(q)):
+            total = 0
+            for e in range(entryStart[r], entryStart[r + 1]):
+                total += entryProb[e] * (entryReward[e] + discount * values[entryNext[e]])
+            q[r] = total
+        return q
+
+    def backup(self, values, discount):
+        """
+        Returns the value table after one synchronous Bellman backup.  States
+        with no actions (including terminal states) get 0.
+        """
+        q = self.qValues(values, discount)
+        if self.useNumpy:
+            return self._maxima(q)
+
+        rowStart = self.rowStart
+        newValues = [0.0] * len(self.states)
+        for i in range(len(newValues)):
+            if rowStart[i] < rowStart[i + 1]:
+                newValues[i] = max(q[rowStart[i]:rowStart[i + 1]])
+        return newValues
+
+    def bestActions(self, values, discount):
+        """
+        Returns the best action for every state (None if it has none), ties
+        going to whichever action the MDP listed first.
+        """
+        q = self.qValues(values, discount)
+        rowStart, rowAction = self.rowStart, self.rowAction
+        actions = [None] * len(self.states)
+        if self.useNumpy:
+            # The rows which reach their state's maximum, and of those the
+            # first one for each state
+            top = np.flatnonzero(q >= self._maxima(q)[self._rowState])
+            states, first = np.unique(self._rowState[top], return_index=True)
+            for i, r in zip(states.tolist(), top[first].tolist()):
+                actions[i] = rowAction[r]
+            return actions
+
+        for i in range(len(actions)):
+            start, end = rowStart[i], rowStart[i + 1]
+            if start < end:
+                best = start
+                for r in range(start + 1, end):
+                    if q[r] > q[best]:
+                        best = r
+                actions[i] = rowAction[best]
+        return actions
+
+    def _maxima(self, q):
+        # The largest Q-value of each state's rows (0 if it has none)
+        maxima = np.zeros(len(self.states))
+        if len(q):
+            maxima[self._hasRows] = np.maximum.reduceat(q, self._firstRows)
+        return maxima
+
+    def stateValue(self, i, values, discount):
+        """
+        Returns state i's value after a Bellman backup of just that state
+        (0 if it has no actions).  values should be a list here; indexing
+        a NumPy array one element at a time is slow.
+        """
+        rowStart, entryStart = self.rowStart, self.entryStart
+        entryNext, entryProb, entryReward = self.entryNext, self.entryProb, self.entryReward
+        best = None
+        for r in range(rowStart[i], rowStart[i + 1]):
+            total = 0
+            for e in range(entryStart[r], entryStart[r + 1]):
+                total += entryProb[e] * (entryReward[e] + discount * values[entryNext[e]])
+            if best is None or total > best:
+                best = total
+        return 0.0 if best is None else best
+
+    def predecessors(self):
+        """
+        Returns a list whose j-th element lists (in order, without repeats)
+        every state i which can move to state j with nonzero probability.
+        """
+        preds = [[] for _ in self.states]
+        rowStart, entryStart = self.rowStart, self.entryStart
+        entryNext, entryProb = self.entryNext, self.entryProb
+        for i in range(len(self.states)):
+            for e in range(entryStart[rowStart[i]], entryStart[rowStart[i + 1]]):
+                j = entryNext[e]
+                if entryProb[e] > 0 and (not preds[j] or preds[j][-1] != i):
+                    preds[j].append(i)
+        return preds
+
+    def maxChange(self, values, newValues):
+        if self.useNumpy:
+            return float(np.max(np.abs(newValues - values))) if len(values) else 0.0
+        return max([abs(a - b) for a, b in zip(values, newValues)] or [0.0])
+
+    def solve(self, discount, iterations, tolerance=0.0, values=None):
+        """
+        Runs up to `iterations` sweeps of value iteration, starting from
+        `values` (all zeros by default).  Stops early once no value changes
+        by more than `tolerance`.  Returns (values, sweeps run).
+        """
+        if values is None:
+            values = self.zeros()
+        for sweep in range(iterations):
+            newValues = self.backup(values, discount)
+            change = self.maxChange(values, newValues)
+            values = newValues
+            if change <= tolerance:
+                return values, sweep + 1
+        return values, iterations
+
+    def toDict(self, values):
+        """Returns {state: value} for a value table."""
+        return {state: float(v) for state, v in zip(self.states, values)}
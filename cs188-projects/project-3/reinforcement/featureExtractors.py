@@ -15,7 +15,39 @@
 "Feature extractors for Pacman game states"
 
 from game import Directions, Actions
+from mazeDistances import getMazeDistances
 import util
+import zlib
+
+import numpy as np
+
+class FeatureIndex:
+    """
+      Numbers features, so their weights can live in an array.
+
+      By default each feature key gets the next free id the first time
+      it's seen.  With size set, keys are hashed into size buckets instead
+      (the "hashing trick"), which caps memory at the cost of the odd
+      collision.
+    """
+    def __init__(self, size=None):
+        self.size = size
+        self.ids = {}
+        self.keys = []  # Id -> key, when not hashing
+
+    def __len__(self):
+        if self.size is not None:
+            return self.size
+        return len(self.keys)
+
+    def lookup(self, key):
+        if self.size is not None:
+            return zlib.crc32(repr(key).encode()) % self.size
+        i = self.ids.get(key)
+        if i is None:
+            i = self.ids[key] = len(self.keys)
+            self.keys.append(key)
+        return i
 
 class FeatureExtractor:
     def getFeatures(self, state, action):
@@ -26,6 +58,17 @@ class FeatureExtractor:
         """
         util.raiseNotDefined()
 
+    def getSparseFeatures(self, state, action, index):
+        """
+          Returns the features as a sparse vector: a pair of arrays, the
+          ids (from index, a FeatureIndex) of the nonzero features and
+          their values.  Override this to skip building a Counter.
+        """
+        feats = self.getFeatures(state, action)
+        ids = np.fromiter((index.lookup(f) for f in feats), dtype=np.intp, count=len(feats))
+        values = np.fromiter(feats.values(), dtype=float, count=len(feats))
+        return ids, values
+
 class IdentityExtractor(FeatureExtractor):
     def getFeatures(self, state, action):
         feats = util.Counter()
@@ -45,23 +88,12 @@ def closestFood(pos, food, walls):
     """
     closestFood -- this is similar to the function that we have
     worked on in the search project; here its all in one place
+
+    Returns the maze distance to the closest food, or None if there is no
+    food.  The distances come from a table built once per layout (see
+    mazeDistances.py) rather than a BFS per call.
     """
-    fringe = [(pos[0], pos[1], 0)]
-    expanded = set()
-    while fringe:
-        pos_x, pos_y, dist = fringe.pop(0)
-        if (pos_x, pos_y) in expanded:
-            continue
-        expanded.add((pos_x, pos_y))
-        # if we find a food at this location then exit
-        if food[pos_x][pos_y]:
-            return dist
-        # otherwise spread out from the location to its neighbours
-        nbrs = Actions.getLegalNeighbors((pos_x, pos_y), walls)
-        for nbr_x, nbr_y in nbrs:
-            fringe.append((nbr_x, nbr_y, dist+1))
-    # no food found
-    return None
+    return getMazeDistances(walls).closestDistance(pos, food)
 
 class SimpleExtractor(FeatureExtractor):
     """
@@ -73,14 +105,27 @@ class SimpleExtractor(FeatureExtractor):
     """
 
     def getFeatures(self, state, action):
+        features = util.Counter()
+        for key, value in self.getFeatureItems(state, action):
+            features[key] = value
+        return features
+
+    def getSparseFeatures(self, state, action, index):
+        items = self.getFeatureItems(state, action)
+        ids = np.array([index.lookup(key) for key, _ in items], dtype=np.intp)
+        values = np.array([value for _, value in items])
+        return ids, values
+
+    def getFeatureItems(self, state, action):
+        """
+          The features as a list of (key, value) pairs.
+        """
         # extract the grid of food and wall locations and get the ghost locations
         food = state.getFood()
         walls = state.getWalls()
         ghosts = state.getGhostPositions()
 
-        features = util.Counter()
-
-        features["bias"] = 1.0
+        features = [("bias", 1.0)]
 
         # compute the location of pacman after he takes the action
         x, y = state.getPacmanPosition()
@@ -88,16 +133,16 @@ class SimpleExtractor(FeatureExtractor):
         next_x, next_y = int(x + dx), int(y + dy)
 
         # count the number of ghosts 1-step away
-        features["#-of-ghosts-1-step-away"] = sum((next_x, next_y) in Actions.getLegalNeighbors(g, walls) for g in ghosts)
+        ghostsNear = sum((next_x, next_y) in Actions.getLegalNeighbors(g, walls) for g in ghosts)
+        features.append(("#-of-ghosts-1-step-away", ghostsNear))
 
         # if there is no danger of ghosts then add the food feature
-        if not features["#-of-ghosts-1-step-away"] and food[next_x][next_y]:
-            features["eats-food"] = 1.0
+        if not ghostsNear and food[next_x][next_y]:
+            features.append(("eats-food", 1.0))
 
         dist = closestFood((next_x, next_y), food, walls)
         if dist is not None:
             # make the distance a number less than one otherwise the update
             # will diverge wildly
-            features["closest-food"] = float(dist) / (walls.width * walls.height)
-        features.divideAll(10.0)
-        return features
+            features.append(("closest-food", float(dist) / (walls.width * walls.height)))
+        return [(key, value / 10.0) for key, value in features]
@@ -33,6 +33,13 @@ class Gridworld(mdp.MarkovDecisionProcess):
         self.noise = 0.2
         # self.noise = 0
 
+        # Caches, filled in as they're used.  They assume the grid itself
+        # doesn't change once the Gridworld has been made.
+        self._states = None
+        self._actions = {}      # state -> legal actions
+        self._transitions = {}  # (state, action) -> ((nextState, prob), ...)
+        self._rewards = {}      # state -> reward for leaving it
+
     def setLivingReward(self, reward):
         """
         The (negative) reward for exiting "normal" states.
@@ -42,12 +49,14 @@ class Gridworld(mdp.MarkovDecisionProcess):
         future rewards.
         """
         self.livingReward = reward
+        self._rewards = {}
 
     def setNoise(self, noise):
         """
         The probability of moving in an unintended direction.
         """
         self.noise = noise
+        self._transitions = {}
 
 
     def getPossibleActions(self, state):
@@ -58,6 +67,12 @@ class Gridworld(mdp.MarkovDecisionProcess):
         that "exit" states transition to the terminal
         state under the special action "done".
         """
+        actions = self._actions.get(state)
+        if actions is None:
+            actions = self._actions[state] = self._computePossibleActions(state)
+        return actions
+
+    def _computePossibleActions(self, state):
         if state == self.grid.terminalState:
             return ()
         x,y = state
@@ -75,6 +90,11 @@ class Gridworld(mdp.MarkovDecisionProcess):
         """
         Return list of all states.
         """
+        if self._states is None:
+            self._states = self._computeStates()
+        return list(self._states)
+
+    def _computeStates(self):
         # The true terminal state.
         states = [self.grid.terminalState]
         for x in range(self.grid.width):
@@ -92,6 +112,12 @@ class Gridworld(mdp.MarkovDecisionProcess):
         departed (as in the R+N book examples, which more or
         less use this convention).
         """
+        reward = self._rewards.get(state)
+        if reward is None:
+            reward = self._rewards[state] = self._computeReward(state)
+        return reward
+
+    def _computeReward(self, state):
         if state == self.grid.terminalState:
             return 0.0
         x, y = state
@@ -124,19 +150,30 @@ class Gridworld(mdp.MarkovDecisionProcess):
         representing the states reachable
         from 'state' by taking 'action' along
         with their transition probabilities.
+
+        The result is shared between calls, so don't modify it.
         """
+        key = (state, action)
+        successors = self._transitions.get(key)
+        if successors is None:
+            successors = self._transitions[key] = self._computeTransitionStatesAndProbs(state, action)
+        return successors
 
+    def _computeTransitionStatesAndProbs(self, state, action):
+        """
+        getTransitionStatesAndProbs() without the cache.
+        """
         if action not in self.getPossibleActions(state):
             raise Exception("Illegal action!")
 
         if self.isTerminal(state):
-            return []
+            return ()
 
         x, y = state
 
         if type(self.grid[x][y]) == int or type(self.grid[x][y]) == float:
             termState = self.grid.terminalState
-            return [(termState, 1.0)]
+            return ((termState, 1.0),)
 
         successors = []
 
@@ -176,7 +213,7 @@ class Gridworld(mdp.MarkovDecisionProcess):
         newStatesAndProbs = []
         for state, prob in list(counter.items()):
             newStatesAndProbs.append((state, prob))
-        return newStatesAndProbs
+        return tuple(newStatesAndProbs)
 
     def __isAllowed(self, y, x):
         if y < 0 or y >= self.grid.height: return False
@@ -415,7 +452,7 @@ def parseOptions():
                          help='Request a window width of X pixels *per grid cell* (default %default)')
     optParser.add_option('-a', '--agent',action='store', metavar="A",
                          type='string',dest='agent',default="random",
-                         help='Agent type (options are \'random\', \'value\', \'q\', and \'learn\', default %default)')
+                         help='Agent type (options are \'random\', \'value\', \'vectorvalue\', \'q\', \'arrayq\', and \'learn\', default %default)')
     optParser.add_option('-t', '--text',action='store_true',
                          dest='textDisplay',default=False,
                          help='Use text-only ASCII display')
@@ -436,7 +473,7 @@ def parseOptions():
 
     opts, args = optParser.parse_args()
 
-    if opts.manual and (opts.agent != 'q' and opts.agent != 'learn'):
+    if opts.manual and (opts.agent not in ('q', 'arrayq', 'learn')):
         print('## Disabling Agents in Manual Mode (-m) ##')
         opts.agent = None
 
@@ -490,6 +527,8 @@ if __name__ == '__main__':
     a = None
     if opts.agent == 'value':
         a = valueIterationAgents.ValueIterationAgent(mdp, opts.discount, opts.iters)
+    elif opts.agent == 'vectorvalue':
+        a = valueIterationAgents.VectorizedValueIterationAgent(mdp, opts.discount, opts.iters)
     elif opts.agent == 'learn':
         print("HERE")
         gridWorldEnv = GridworldEnvironment(mdp)
@@ -499,7 +538,7 @@ if __name__ == '__main__':
                       'epsilon': opts.epsilon,
                       'actionFn': actionFn}
         a = qlearningAgents.LearnedQAgent(gridWorldEnv.gridWorld, **qLearnOpts)
-    elif opts.agent == 'q':
+    elif opts.agent in ('q', 'arrayq'):
         #env.getPossibleActions, opts.discount, opts.learningRate, opts.epsilon
         #simulationFn = lambda agent, state: simulation.GridworldSimulation(agent,state,mdp)
         gridWorldEnv = GridworldEnvironment(mdp)
@@ -508,7 +547,10 @@ if __name__ == '__main__':
                       'alpha': opts.learningRate,
                       'epsilon': opts.epsilon,
                       'actionFn': actionFn}
-        a = qlearningAgents.QLearningAgent(**qLearnOpts)
+        if opts.agent == 'arrayq':
+            a = qlearningAgents.ArrayQLearningAgent(**qLearnOpts)
+        else:
+            a = qlearningAgents.QLearningAgent(**qLearnOpts)
     elif opts.agent == 'random':
         # # No reason to use the random agent without episodes
         if opts.episodes == 0:
@@ -539,7 +581,7 @@ if __name__ == '__main__':
     ###########################
     # DISPLAY Q/V VALUES BEFORE SIMULATION OF EPISODES
     try:
-        if not opts.manual and opts.agent in ('value', 'asynchvalue', 'priosweepvalue', 'learn'):
+        if not opts.manual and opts.agent in ('value', 'vectorvalue', 'asynchvalue', 'priosweepvalue', 'learn'):
             if opts.valueSteps:
                 for i in range(opts.iters):
                     tempAgent = valueIterationAgents.ValueIterationAgent(mdp, opts.discount, i)
@@ -561,9 +603,9 @@ if __name__ == '__main__':
         if opts.manual and opts.agent == None:
             displayCallback = lambda state: display.displayNullValues(state)
         else:
-            if opts.agent in ('random', 'value', 'asynchvalue', 'priosweepvalue'):
+            if opts.agent in ('random', 'value', 'vectorvalue', 'asynchvalue', 'priosweepvalue'):
                 displayCallback = lambda state: display.displayValues(a, state, "CURRENT VALUES")
-            if opts.agent == 'q': displayCallback = lambda state: display.displayQValues(a, state, "CURRENT Q-VALUES")
+            if opts.agent in ('q', 'arrayq'): displayCallback = lambda state: display.displayQValues(a, state, "CURRENT Q-VALUES")
 
     messageCallback = lambda x: printString(x)
     if opts.quiet:
@@ -595,7 +637,7 @@ if __name__ == '__main__':
         print()
 
     # DISPLAY POST-LEARNING VALUES / Q-VALUES
-    if opts.agent == 'q' and not opts.manual:
+    if opts.agent in ('q', 'arrayq') and not opts.manual:
         try:
             display.displayQValues(a, message = "Q-VALUES AFTER "+str(opts.episodes)+" EPISODES")
             display.pause()
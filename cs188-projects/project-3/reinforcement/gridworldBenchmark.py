@@ -0,0 +1,68 @@
+# gridworldBenchmark.py
+# ---------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Times the Gridworld MDP methods with and without their caches.
+
+  python gridworldBenchmark.py [-s SIZE]
+
+The uncached numbers call the _compute*() methods which fill the caches,
+which is what every call used to do.
+"""
+
+import optparse
+import time
+
+import valueIterationAgents
+import valueIterationBenchmark
+
+
+def callsPerSecond(fn, args):
+    start = time.time()
+    for a in args:
+        fn(*a)
+    return len(args) / (time.time() - start)
+
+
+if __name__ == '__main__':
+    optParser = optparse.OptionParser()
+    optParser.add_option('-s', '--size', type='int', dest='size', default=100,
+                         help='Width and height of the grid (default %default)')
+    opts, args = optParser.parse_args()
+
+    mdp = valueIterationBenchmark.makeBigGrid(opts.size)
+    states = mdp.getStates()
+    stateArgs = [(s,) for s in states]
+    pairs = [(s, a) for s in states for a in mdp.getPossibleActions(s)]
+    triples = [(s, a, s) for s, a in pairs]
+    print("%d states, %d (state, action) pairs" % (len(states), len(pairs)))
+
+    print("%-28s %14s %14s" % ("calls/sec", "uncached", "cached"))
+    for name, args in [("getStates", [()] * 20),
+                       ("getPossibleActions", stateArgs),
+                       ("getTransitionStatesAndProbs", pairs),
+                       ("getReward", triples)]:
+        uncached = getattr(mdp, "_compute" + name[3:])
+        if name == "getReward":
+            uncached = lambda state, action, nextState: mdp._computeReward(state)
+        slow = callsPerSecond(uncached, args)
+        callsPerSecond(getattr(mdp, name), args)  # Fill the cache first
+        fast = callsPerSecond(getattr(mdp, name), args)
+        print("%-28s %14.0f %14.0f" % (name, slow, fast))
+
+    for agentClass, iterations in [(valueIterationAgents.ValueIterationAgent, 5),
+                                   (valueIterationAgents.VectorizedValueIterationAgent, 5)]:
+        start = time.time()
+        agentClass(mdp, 0.9, iterations)
+        print("%s, %d sweeps: %.3fs" % (agentClass.__name__, iterations, time.time() - start))
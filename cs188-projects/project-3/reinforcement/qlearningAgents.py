@@ -132,6 +132,121 @@ class QLearningAgent(ReinforcementAgent):
         return self.computeValueFromQValues(state)
 
 
+class ArrayQLearningAgent(QLearningAgent):
+    """
+      A QLearningAgent which keeps its Q-values in a NumPy array instead of
+      a Counter.  Each state and action gets an integer id (a row or a
+      column) the first time it's seen, and a state's legal actions are
+      looked up once and remembered, so they must not change.
+
+      It acts and learns exactly like QLearningAgent, random choices
+      included, and adds updateBatch() for learning from many (replayed)
+      transitions at once.
+    """
+    def __init__(self, **args):
+        QLearningAgent.__init__(self, **args)
+        self.stateIds = {}
+        self.actionIds = {}
+        self.actions = []  # Action id -> action
+        self.legal = []    # State id -> list of its legal action ids
+        self.table = np.zeros((64, 4))
+        self.legalMask = np.zeros((64, 4), dtype=bool)
+
+    def _actionId(self, action):
+        aid = self.actionIds.get(action)
+        if aid is None:
+            aid = self.actionIds[action] = len(self.actions)
+            self.actions.append(action)
+            if aid >= self.table.shape[1]:
+                self.table = np.hstack([self.table, np.zeros_like(self.table)])
+                self.legalMask = np.hstack([self.legalMask, np.zeros_like(self.legalMask)])
+        return aid
+
+    def _stateId(self, state):
+        sid = self.stateIds.get(state)
+        if sid is None:
+            legal = [self._actionId(a) for a in self.getLegalActions(state)]
+            sid = self.stateIds[state] = len(self.legal)
+            self.legal.append(legal)
+            if sid >= self.table.shape[0]:
+                self.table = np.vstack([self.table, np.zeros_like(self.table)])
+                self.legalMask = np.vstack([self.legalMask, np.zeros_like(self.legalMask)])
+            self.legalMask[sid, legal] = True
+        return sid
+
+    def getQValue(self, state, action):
+        sid = self.stateIds.get(state)
+        aid = self.actionIds.get(action)
+        if sid is None or aid is None:
+            return 0.0
+        return float(self.table[sid, aid])
+
+    def _legalQValues(self, sid):
+        # A handful of actions is faster to handle as a Python list than
+        # with NumPy calls, so take the whole row out in one go.
+        row = self.table[sid].tolist()
+        return [row[a] for a in self.legal[sid]]
+
+    def computeValueFromQValues(self, state):
+        sid = self._stateId(state)
+        if not self.legal[sid]:
+            return 0.0
+        return max(self._legalQValues(sid))
+
+    def computeActionFromQValues(self, state):
+        sid = self._stateId(state)
+        legal = self.legal[sid]
+        if not legal:
+            return None
+        q = self._legalQValues(sid)
+        best = max(q)
+        return self.actions[random.choice([a for a, v in zip(legal, q) if v == best])]
+
+    def getAction(self, state):
+        sid = self._stateId(state)
+        legal = self.legal[sid]
+        if not legal:
+            return None
+
+        if util.flipCoin(self.epsilon):
+            return self.actions[random.choice(legal)]
+
+        q = self._legalQValues(sid)
+        best = max(q)
+        if best <= 0:
+            unseen = [a for a, v in zip(legal, q) if v == 0]
+            if unseen:
+                return self.actions[random.choice(unseen)]
+        return self.actions[legal[q.index(best)]]
+
+    def update(self, state, action, nextState, reward: float):
+        sid = self._stateId(state)
+        aid = self._actionId(action)
+        nextQ = self.computeValueFromQValues(nextState)
+        currentQ = self.table.item(sid, aid)
+        self.table[sid, aid] = (1 - self.alpha) * currentQ + self.alpha * (reward + self.discount * nextQ)
+
+    def updateBatch(self, transitions):
+        """
+          Learns from a list of (state, action, nextState, reward)
+          transitions at once.  Every target uses the Q-values from before
+          the batch, and if a (state, action) appears more than once its
+          changes are added together.
+        """
+        if not transitions:
+            return
+        rows = np.array([self._stateId(s) for s, _, _, _ in transitions], dtype=np.intp)
+        cols = np.array([self._actionId(a) for _, a, _, _ in transitions], dtype=np.intp)
+        nextRows = np.array([self._stateId(n) for _, _, n, _ in transitions], dtype=np.intp)
+        rewards = np.array([r for _, _, _, r in transitions], dtype=float)
+
+        mask = self.legalMask[nextRows]
+        nextQ = np.where(mask, self.table[nextRows], -np.inf).max(axis=1)
+        nextQ[~mask.any(axis=1)] = 0.0
+        targets = rewards + self.discount * nextQ
+        np.add.at(self.table, (rows, cols), self.alpha * (targets - self.table[rows, cols]))
+
+
 class PacmanQAgent(QLearningAgent):
     "Exactly the same as QLearningAgent, but with different default parameters"
 
@@ -168,34 +283,79 @@ class ApproximateQAgent(PacmanQAgent):
        You should only have to overwrite getQValue
        and update.  All other QLearningAgent functions
        should work as is.
+
+       Features come from the extractor as sparse vectors (see
+       FeatureExtractor.getSparseFeatures), numbered by a FeatureIndex,
+       and the weights are a NumPy array indexed the same way.  Pass
+       featureBuckets to hash features into that many weights instead of
+       giving each its own.
+
+       A step asks for the same features several times (getAction looks
+       at every action from a state, then update looks at them again from
+       the next state), so they're cached until the step after.
     """
-    def __init__(self, extractor='IdentityExtractor', **args):
+    def __init__(self, extractor='IdentityExtractor', featureBuckets=None, **args):
         self.featExtractor = util.lookup(extractor, globals())()
         PacmanQAgent.__init__(self, **args)
-        self.weights = util.Counter()
+        if featureBuckets is not None:
+            featureBuckets = int(featureBuckets)
+        self.featureIndex = FeatureIndex(featureBuckets)
+        self.weightArray = np.zeros(max(64, len(self.featureIndex)))
+        self.featureCache = {}  # (id(state), action) -> (state, features)
+
+    MAX_CACHED_FEATURES = 256
 
     def getWeights(self):
-        return self.weights
+        """
+          The weights as a Counter keyed by feature (or by bucket, when
+          hashing features).
+        """
+        index = self.featureIndex
+        if index.size is not None:
+            return util.Counter({i: float(w) for i, w in enumerate(self.weightArray) if w})
+        return util.Counter({key: float(self.weightArray[i]) for i, key in enumerate(index.keys)})
+
+    def getSparseFeatures(self, state, action):
+        key = (id(state), action)
+        cached = self.featureCache.get(key)
+        if cached is not None and cached[0] is state:
+            return cached[1]
+        features = self.featExtractor.getSparseFeatures(state, action, self.featureIndex)
+        if len(self.featureIndex) > len(self.weightArray):
+            grown = np.zeros(max(len(self.featureIndex), 2 * len(self.weightArray)))
+            grown[:len(self.weightArray)] = self.weightArray
+            self.weightArray = grown
+        if len(self.featureCache) >= self.MAX_CACHED_FEATURES:
+            self.featureCache.clear()
+        # Keeping state in the cache also keeps its id from being reused
+        self.featureCache[key] = (state, features)
+        return features
 
     def getQValue(self, state, action):
         """
           Should return Q(state,action) = w * featureVector
           where * is the dotProduct operator
         """
-        features = self.featExtractor.getFeatures(state, action)
-        return sum(self.weights[f] * features[f] for f in features)
+        ids, values = self.getSparseFeatures(state, action)
+        return float(self.weightArray[ids] @ values)
 
     def update(self, state, action, nextState, reward: float):
         """
            Should update your weights based on transition
         """
-        features = self.featExtractor.getFeatures(state, action)
+        ids, values = self.getSparseFeatures(state, action)
         qValue = self.getQValue(state, action)
-        nextQValue = max(self.getQValue(nextState, a) for a in self.getLegalActions(nextState)) if self.getLegalActions(nextState) else 0.0
+        nextQValue = self.computeValueFromQValues(nextState)
         difference = (reward + self.discount * nextQValue) - qValue
 
-        for f in features:
-            self.weights[f] += self.alpha * difference * features[f]
+        if self.featureIndex.size is None:
+            self.weightArray[ids] += self.alpha * difference * values
+        else:
+            # Hashed features can share a bucket
+            np.add.at(self.weightArray, ids, self.alpha * difference * values)
+
+        # Only the next state's features can be asked for again
+        self.featureCache = {k: v for k, v in self.featureCache.items() if v[0] is nextState}
 
     def final(self, state):
         """Called at the end of each game."""
@@ -205,5 +365,5 @@ class ApproximateQAgent(PacmanQAgent):
         # did we finish training?
         if self.episodesSoFar == self.numTraining:
             # you might want to print your weights here for debugging
-            print("Final Weights:", self.weights)
+            print("Final Weights:", self.getWeights())
 
@@ -29,7 +29,9 @@
 import mdp, util
 
 from learningAgents import ValueEstimationAgent
+from compiledMdp import CompiledMDP
 import collections
+import heapq
 
 class ValueIterationAgent(ValueEstimationAgent):
     """
@@ -131,3 +133,105 @@ class ValueIterationAgent(ValueEstimationAgent):
 
     def getQValue(self, state, action):
         return self.computeQValueFromValues(state, action)
+
+
+class VectorizedValueIterationAgent(ValueIterationAgent):
+    """
+        A ValueIterationAgent which compiles the mdp into index tables
+        (see compiledMdp.py) and runs the sweeps on those, with NumPy if it's
+        installed.  It computes the same values as ValueIterationAgent, much
+        faster on big MDPs.
+
+        If tolerance is positive, it stops early once a sweep changes no
+        value by more than tolerance; self.sweeps says how many it ran.
+    """
+    def __init__(self, mdp: mdp.MarkovDecisionProcess, discount = 0.9, iterations = 100, tolerance = 0.0):
+        self.tolerance = tolerance
+        self.compiled = None
+        ValueIterationAgent.__init__(self, mdp, discount, iterations)
+
+    def runValueIteration(self):
+        if self.compiled is None:
+            self.compiled = CompiledMDP(self.mdp)
+        values, self.sweeps = self.compiled.solve(self.discount, self.iterations, self.tolerance)
+        self.values = util.Counter(self.compiled.toDict(values))
+        self.policy = None
+
+    def computeActionFromValues(self, state):
+        if self.policy is None:
+            # Every state's best action at once (vectorized with NumPy)
+            compiled = self.compiled
+            values = [self.values[s] for s in compiled.states]
+            if compiled.useNumpy:
+                values = compiled.zeros() + values
+            actions = compiled.bestActions(values, self.discount)
+            self.policy = dict(zip(compiled.states, actions))
+        return self.policy.get(state)
+
+
+class AsynchronousValueIterationAgent(ValueIterationAgent):
+    """
+        An AsynchronousValueIterationAgent updates one state per iteration,
+        in place, cycling through the states in the order mdp.getStates()
+        lists them.  Each update sees the values of the ones before it,
+        so it usually needs fewer updates than full sweeps would.
+    """
+    def __init__(self, mdp: mdp.MarkovDecisionProcess, discount = 0.9, iterations = 1000):
+        ValueIterationAgent.__init__(self, mdp, discount, iterations)
+
+    def runValueIteration(self):
+        compiled = CompiledMDP(self.mdp, useNumpy=False)
+        values = [0.0] * len(compiled)
+        if len(compiled):
+            for iteration in range(self.iterations):
+                i = iteration % len(compiled)
+                # Terminal states have no rows, so they stay 0
+                values[i] = compiled.stateValue(i, values, self.discount)
+        self.values = util.Counter(compiled.toDict(values))
+
+
+class PrioritizedSweepingValueIterationAgent(AsynchronousValueIterationAgent):
+    """
+        A PrioritizedSweepingValueIterationAgent updates one state per
+        iteration, always the one whose value is furthest from its
+        backed-up value (its Bellman error).  After each update, only the
+        states which can move into the updated one are rechecked.  States
+        whose error is at most theta are left alone, and it stops early
+        once none are left, so it only ever touches states whose values
+        are still changing.
+    """
+    def __init__(self, mdp: mdp.MarkovDecisionProcess, discount = 0.9, iterations = 100, theta = 1e-5):
+        self.theta = theta
+        ValueIterationAgent.__init__(self, mdp, discount, iterations)
+
+    def runValueIteration(self):
+        compiled = CompiledMDP(self.mdp, useNumpy=False)
+        predecessors = compiled.predecessors()
+        values = [0.0] * len(compiled)
+        discount, theta = self.discount, self.theta
+
+        # A heap of (-error, i), with stale entries skipped when popped;
+        # queued[i] is the priority of state i's live entry.
+        heap = []
+        queued = {}
+        for i in range(len(compiled)):
+            error = abs(values[i] - compiled.stateValue(i, values, discount))
+            if error > theta:
+                queued[i] = -error
+                heap.append((-error, i))
+        heapq.heapify(heap)
+
+        self.updates = 0
+        while self.updates < self.iterations and heap:
+            priority, i = heapq.heappop(heap)
+            if queued.get(i) != priority:
+                continue
+            del queued[i]
+            values[i] = compiled.stateValue(i, values, discount)
+            self.updates += 1
+            for p in predecessors[i]:
+                error = abs(values[p] - compiled.stateValue(p, values, discount))
+                if error > theta and -error < queued.get(p, 0):
+                    queued[p] = -error
+                    heapq.heappush(heap, (-error, p))
+        self.values = util.Counter(compiled.toDict(values))
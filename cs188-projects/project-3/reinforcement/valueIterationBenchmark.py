@@ -0,0 +1,84 @@
+# valueIterationBenchmark.py
+# --------------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Times value iteration on big random gridworlds.
+
+  python valueIterationBenchmark.py [-s SIZE] [-i ITERATIONS] [-t TOLERANCE]
+
+makes a SIZE x SIZE gridworld (about SIZE**2 states) and times the
+ValueIterationAgent for a couple of sweeps, then the
+VectorizedValueIterationAgent until it converges.
+"""
+
+import optparse
+import random
+import time
+
+import gridworld
+import valueIterationAgents
+
+
+def makeBigGrid(size, seed=0):
+    """A size x size gridworld with scattered walls, pits and exits."""
+    rand = random.Random(seed)
+    rows = []
+    for y in range(size):
+        row = []
+        for x in range(size):
+            r = rand.random()
+            if r < 0.15:
+                row.append('#')
+            elif r < 0.152:
+                row.append(-10)
+            elif r < 0.153:
+                row.append(10)
+            else:
+                row.append(' ')
+        rows.append(row)
+    rows[0][0] = 'S'
+    return gridworld.Gridworld(rows)
+
+
+def timeAgent(agentClass, mdp, *args):
+    start = time.time()
+    agent = agentClass(mdp, *args)
+    return agent, time.time() - start
+
+
+if __name__ == '__main__':
+    optParser = optparse.OptionParser()
+    optParser.add_option('-s', '--size', type='int', dest='size', default=316,
+                         help='Width and height of the grid (default %default)')
+    optParser.add_option('-i', '--iterations', type='int', dest='iterations', default=1000,
+                         help='Most sweeps to run (default %default)')
+    optParser.add_option('-t', '--tolerance', type='float', dest='tolerance', default=1e-6,
+                         help='Stop once no value changes by more than this (default %default)')
+    opts, args = optParser.parse_args()
+
+    mdp = makeBigGrid(opts.size)
+    print("%d states" % len(mdp.getStates()))
+
+    slowSweeps = 2
+    agent, elapsed = timeAgent(valueIterationAgents.ValueIterationAgent, mdp, 0.9, slowSweeps)
+    print("ValueIterationAgent:           %8.3fs per sweep" % (elapsed / slowSweeps))
+
+    agent, elapsed = timeAgent(valueIterationAgents.VectorizedValueIterationAgent, mdp,
+                               0.9, opts.iterations, opts.tolerance)
+    compiled = agent.compiled
+    print("VectorizedValueIterationAgent: %8.3fs for %d sweeps (%s)"
+          % (elapsed, agent.sweeps, "numpy" if compiled.useNumpy else "pure Python"))
+    start = time.time()
+    compiled.solve(0.9, 10)
+    print("  of which a sweep:            %8.3fs" % ((time.time() - start) / 10))
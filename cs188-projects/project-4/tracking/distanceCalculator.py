@@ -31,6 +31,11 @@ distances.
 """
 
 import threading, sys, time, random
+from mazeDistances import getMazeDistances, UNREACHABLE
+
+# What the distance between cells with no path between them has always been
+# reported as here.
+UNREACHABLE_DISTANCE = 1000000000
 
 class Distancer:
   def __init__(self, layout, background=True, default=10000):
@@ -75,11 +80,13 @@ class Distancer:
     return bestDistance
 
   def getDistanceOnGrid(self, pos1, pos2):
-    key = (pos1, pos2)
-    if key in self._distances:
-      return self._distances[key]
-    else:
-      raise Exception("Positions not in grid: " + str(key))
+    try:
+      distance = self._distances.getDistance(pos1, pos2)
+    except KeyError:
+      raise Exception("Positions not in grid: " + str((pos1, pos2)))
+    if distance == UNREACHABLE:
+      return UNREACHABLE_DISTANCE
+    return distance
 
   def isReadyForMazeDistance(self):
     return self._distances != None
@@ -143,49 +150,18 @@ class DistanceCalculator(threading.Thread):
     self.distancer._distances = distances
 
 def computeDistances(layout):
-    distances = {}
-    allNodes = layout.walls.asList(False)
-    for source in allNodes:
-        dist = {}
-        closed = {}
-        for node in allNodes:
-            dist[node] = 1000000000
-        import util
-        queue = util.PriorityQueue()
-        queue.push(source, 0)
-        dist[source] = 0
-        while not queue.isEmpty():
-            node = queue.pop()
-            if node in closed:
-                continue
-            closed[node] = True
-            nodeDist = dist[node]
-            adjacent = []
-            x, y = node
-            if not layout.isWall((x,y+1)):
-                adjacent.append((x,y+1))
-            if not layout.isWall((x,y-1)):
-                adjacent.append((x,y-1) )
-            if not layout.isWall((x+1,y)):
-                adjacent.append((x+1,y) )
-            if not layout.isWall((x-1,y)):
-                adjacent.append((x-1,y))
-            for other in adjacent:
-                if not other in dist:
-                    continue
-                oldDist = dist[other]
-                newDist = nodeDist+1
-                if newDist < oldDist:
-                    dist[other] = newDist
-                    queue.push(other, newDist)
-        for target in allNodes:
-            distances[(target, source)] = dist[target]
-    return distances
+    """
+    Returns the MazeDistances for the layout's walls (see mazeDistances.py),
+    which are only computed once per set of walls.
+    """
+    return getMazeDistances(layout.walls)
 
 
 def getDistanceOnGrid(distances, pos1, pos2):
-    key = (pos1, pos2)
-    if key in distances:
-      return distances[key]
-    return 100000
-
+    try:
+      distance = distances.getDistance(pos1, pos2)
+    except KeyError:
+      return 100000
+    if distance == UNREACHABLE:
+      return UNREACHABLE_DISTANCE
+    return distance
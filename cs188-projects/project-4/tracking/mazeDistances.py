@@ -0,0 +1,245 @@
+# mazeDistances.py
+# ----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+All-pairs maze distances for a layout.
+
+getMazeDistances(walls) returns a MazeDistances table for a wall Grid:
+the open cells are numbered (in the order walls.asList(False) gives them)
+and a BFS from each one fills row i of an n x n table of unsigned 16-bit
+distances.  Tables are built once per wall layout and kept in memory for
+the rest of the run.
+
+Set PACMAN_DISTANCE_CACHE to a directory to also save them there (under a
+hash of the walls), so later runs on the same layout just read them back.
+Use a directory only you can write to: a table read back is only checked
+for being a plausible distance table for those walls, not recomputed.
+
+Example:
+distances = getMazeDistances(gameState.getWalls())
+distances.getDistance( (1,1), (10,10) )
+
+If NumPy is installed, distances.matrix is an n x n array view of the same
+table, for looking up many distances at once.
+"""
+
+import array
+import hashlib
+import os
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# The distance between cells with no path between them; larger than any
+# real distance.
+UNREACHABLE = 0xFFFF
+
+# Where tables are saved between runs, or None (the default) to not save them.
+CACHE_DIR = os.environ.get('PACMAN_DISTANCE_CACHE')
+
+class MazeDistances:
+    """
+    The maze distance between every pair of open cells of a wall Grid.
+    """
+    def __init__(self, walls, table=None):
+        self.width = walls.width
+        self.height = walls.height
+        self.cells = walls.asList(False)
+        self.index = {cell: i for i, cell in enumerate(self.cells)}
+        n = len(self.cells)
+        if table is None:
+            table = self._computeTable(walls)
+        if len(table) != n * n:
+            raise ValueError('Expected %d distances, got %d' % (n * n, len(table)))
+        self.table = table
+        self._sorted = [None] * n
+
+        if np is not None:
+            self.matrix = np.frombuffer(table, dtype=np.uint16).reshape(n, n)
+        else:
+            self.matrix = None
+
+    def __len__(self):
+        return len(self.cells)
+
+    def _computeTable(self, walls):
+        neighbors = self._neighbors()
+        n = len(self.cells)
+        table = array.array('H')
+        for source in range(n):
+            row = [UNREACHABLE] * n
+            row[source] = 0
+            frontier = [source]
+            distance = 0
+            while frontier:
+                distance += 1
+                nextFrontier = []
+                for cell in frontier:
+                    for other in neighbors[cell]:
+                        if row[other] == UNREACHABLE:
+                            row[other] = distance
+                            nextFrontier.append(other)
+                frontier = nextFrontier
+            table.extend(row)
+        return table
+
+    def _neighbors(self):
+        # The indices of the open cells next to each open cell.
+        index = self.index
+        neighbors = []
+        for x, y in self.cells:
+            neighbors.append([index[p] for p in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y))
+                              if p in index])
+        return neighbors
+
+    def _checkTable(self):
+        """
+        Raises ValueError unless the table looks like the distances for these
+        walls: zero from each cell to itself, the same in both directions, and
+        one between neighboring cells.
+        """
+        n = len(self.cells)
+        table = self.table
+        for i, neighbors in enumerate(self._neighbors()):
+            row = i * n
+            if table[row + i] != 0:
+                raise ValueError('Nonzero distance from cell %d to itself' % i)
+            for j in neighbors:
+                if table[row + j] != 1:
+                    raise ValueError('Neighboring cells %d and %d are not 1 apart' % (i, j))
+        if self.matrix is not None:
+            symmetric = (self.matrix == self.matrix.T).all()
+        else:
+            symmetric = all(table[i * n + j] == table[j * n + i]
+                            for i in range(n) for j in range(i + 1, n))
+        if not symmetric:
+            raise ValueError('Distances differ by direction')
+
+    def getDistance(self, pos1, pos2):
+        """
+        Returns the maze distance between two open cells (UNREACHABLE if
+        there is no path).  Raises KeyError if either is a wall.
+        """
+        index = self.index
+        return self.table[index[pos1] * len(self.cells) + index[pos2]]
+
+    def getDistances(self, pos):
+        """
+        Returns the distances from pos to every open cell, in the order of
+        self.cells (a NumPy array if NumPy is installed, a list if not).
+        """
+        i = self.index[pos]
+        if self.matrix is not None:
+            return self.matrix[i]
+        n = len(self.cells)
+        return self.table[i * n:(i + 1) * n].tolist()
+
+    def closestDistance(self, pos, grid):
+        """
+        Returns the maze distance from pos to the closest cell which is True
+        in grid (a Grid of booleans, like the food), or None if there isn't
+        one it can reach.
+
+        Like a BFS, this stops at the first such cell, but the cells are
+        visited in an order sorted once per starting cell.
+        """
+        cells, distances = self._byDistance(self.index[pos])
+        data = grid.data
+        for k, (x, y) in enumerate(cells):
+            if data[x][y]:
+                distance = distances[k]
+                return None if distance == UNREACHABLE else distance
+        return None
+
+    def _byDistance(self, i):
+        # Every cell sorted by its distance from cell i, and those distances.
+        byDistance = self._sorted[i]
+        if byDistance is None:
+            n = len(self.cells)
+            row = self.table[i * n:(i + 1) * n]
+            order = sorted(range(n), key=row.__getitem__)
+            byDistance = ([self.cells[j] for j in order], array.array('H', [row[j] for j in order]))
+            self._sorted[i] = byDistance
+        return byDistance
+
+def wallsKey(walls):
+    "A hash of the walls, which names their table in CACHE_DIR"
+    rows = [''.join(['%' if walls[x][y] else ' ' for x in range(walls.width)])
+            for y in range(walls.height)]
+    return hashlib.sha1('\n'.join(rows).encode()).hexdigest()
+
+_tables = {}
+_last = (None, None)
+
+def getMazeDistances(walls):
+    """
+    Returns the MazeDistances for a wall Grid, building it (or loading it
+    from CACHE_DIR, if that's set) the first time a layout's walls are seen.
+    """
+    global _last
+    if _last[0] is walls:
+        return _last[1]
+
+    key = wallsKey(walls)
+    distances = _tables.get(key)
+    if distances is None:
+        distances = _loadTable(walls, key)
+        if distances is None:
+            distances = MazeDistances(walls)
+            _saveTable(distances, key)
+        _tables[key] = distances
+    _last = (walls, distances)
+    return distances
+
+def _cachePath(key):
+    return os.path.join(CACHE_DIR, key + '.bin')
+
+def _loadTable(walls, key):
+    if CACHE_DIR is None:
+        return None
+    try:
+        with open(_cachePath(key), 'rb') as f:
+            table = array.array('H')
+            table.frombytes(f.read())
+    except (OSError, ValueError):
+        return None
+    if sys.byteorder == 'big':
+        table.byteswap()
+    try:
+        distances = MazeDistances(walls, table)
+        distances._checkTable()
+    except ValueError:
+        return None
+    return distances
+
+def _saveTable(distances, key):
+    # The cache is only a speedup, so failing to write it isn't an error.
+    if CACHE_DIR is None:
+        return
+    table = distances.table
+    if sys.byteorder == 'big':
+        table = array.array('H', table)
+        table.byteswap()
+    path = _cachePath(key)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        temporary = '%s.%d.tmp' % (path, os.getpid())
+        with open(temporary, 'wb') as f:
+            table.tofile(f)
+        os.replace(temporary, path)
+    except OSError:
+        pass